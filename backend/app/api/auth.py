@@ -1,20 +1,31 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi import APIRouter, Depends, HTTPException
 from datetime import timedelta
 from typing import Optional
 from app.schemas.auth import LoginRequest, LoginResponse, RegisterRequest, RegisterResponse
 from app.services.supabase import supabase_service
-from app.core.security import create_access_token, verify_password, get_password_hash
+from app.services.cache import cache_service
+from app.services.hasher import password_hasher
+from app.services.revocation import revocation_service
+from app.core.security import create_access_token, verify_token
+from app.api.deps import get_token_payload
 from app.core.config import settings
 
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+
+# Hash for the mock user's "password", computed once instead of on every login
+mock_password_hash: Optional[str] = None
+
+async def get_mock_password_hash() -> str:
+    global mock_password_hash
+    if mock_password_hash is None:
+        mock_password_hash = await password_hasher.hash("password")
+    return mock_password_hash
 
 @router.post("/login", response_model=LoginResponse)
 async def login(request: LoginRequest):
     # Get user from Supabase
     supabase = supabase_service.get_client()
-    user = supabase.table("users").select("*").eq("email", request.email).execute().data
+    user = (await supabase_service.execute(supabase.table("users").select("*").eq("email", request.email))).data
     
     # For testing purposes, if no user found, create a mock user
     if not user:
@@ -25,15 +36,26 @@ async def login(request: LoginRequest):
             "name": "Test User",
             "avatar": "https://picsum.photos/id/100/100/100",
             "role": "user",  # Default role
-            "password": get_password_hash("password")
+            "password": await get_mock_password_hash()
         }
     else:
         mock_user = user[0]
     
     # Verify password
-    if not verify_password(request.password, mock_user.get("password", "password")):
+    valid, new_hash = await password_hasher.verify(request.password, mock_user.get("password", "password"))
+    if not valid:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     
+    # Transparently upgrade hashes made with a different BCRYPT_ROUNDS
+    if new_hash is not None and user:
+        try:
+            await supabase_service.execute(supabase.table("users").update({
+                "password": new_hash
+            }).eq("id", mock_user["id"]))
+            await cache_service.invalidate("users", mock_user["id"])
+        except Exception as e:
+            print(f"Password rehash failed: {e}")
+    
     # Determine if user is admin (for demo purposes, hardcode admin email)
     is_admin = mock_user["email"] == "admin@example.com"  # Demo admin account
     
@@ -56,26 +78,27 @@ async def login(request: LoginRequest):
 async def register(request: RegisterRequest):
     # Check if user already exists
     supabase = supabase_service.get_client()
-    existing_user = supabase.table("users").select("id").eq("email", request.email).execute().data
+    existing_user = (await supabase_service.execute(supabase.table("users").select("id").eq("email", request.email))).data
     
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
+    password_hash = await password_hasher.hash(request.password)
     try:
-        new_user = supabase.table("users").insert({
+        new_user = (await supabase_service.execute(supabase.table("users").insert({
             "email": request.email,
             "name": request.name,
-            "password": get_password_hash(request.password),
+            "password": password_hash,
             "avatar": f"https://picsum.photos/id/{hash(request.email) % 100}/100/100"
-        }).execute().data[0]
+        }))).data[0]
     except:
         # For testing purposes, create a mock user if insertion fails
         new_user = {
             "id": f"user-{hash(request.email)}",
             "email": request.email,
             "name": request.name,
-            "password": get_password_hash(request.password),
+            "password": password_hash,
             "avatar": f"https://picsum.photos/id/{hash(request.email) % 100}/100/100"
         }
     
@@ -94,16 +117,17 @@ async def register(request: RegisterRequest):
     )
 
 @router.post("/logout")
-async def logout():
-    # In a real app, you might want to invalidate the token
-    # For now, we'll just return a success message
+async def logout(payload: dict = Depends(get_token_payload)):
+    # Tokens issued before jti was added can only expire naturally
+    if payload.get("jti"):
+        await revocation_service.revoke(payload["jti"], payload["exp"])
     return {"message": "Successfully logged out"}
 
 @router.post("/forgot-password")
 async def forgot_password(email: str):
     # Check if user exists
     supabase = supabase_service.get_client()
-    user = supabase.table("users").select("id, email").eq("email", email).execute().data
+    user = (await supabase_service.execute(supabase.table("users").select("id, email").eq("email", email))).data
     
     if not user:
         # For security reasons, return success even if user doesn't exist
@@ -125,24 +149,22 @@ async def forgot_password(email: str):
 @router.post("/reset-password")
 async def reset_password(token: str, new_password: str):
     # Verify the token
-    from jose import JWTError, jwt
-    
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        token_type: str = payload.get("type")
-        
-        if user_id is None or token_type != "reset":
-            raise HTTPException(status_code=401, detail="Invalid reset token")
-    except JWTError:
+    payload = verify_token(token)
+    if payload is None or payload.get("sub") is None or payload.get("type") != "reset" \
+            or revocation_service.is_revoked(payload.get("jti")):
         raise HTTPException(status_code=401, detail="Invalid reset token")
+    user_id: str = payload["sub"]
     
     # Update user password
     supabase = supabase_service.get_client()
+    password_hash = await password_hasher.hash(new_password)
     try:
-        supabase.table("users").update({
-            "password": get_password_hash(new_password)
-        }).eq("id", user_id).execute()
+        await supabase_service.execute(supabase.table("users").update({
+            "password": password_hash
+        }).eq("id", user_id))
+        await cache_service.invalidate("users", user_id)
+        # Reset tokens are single use
+        await revocation_service.revoke(payload["jti"], payload["exp"])
     except:
         # For testing purposes, just return success
         pass
@@ -150,18 +172,5 @@ async def reset_password(token: str, new_password: str):
     return {"message": "Password reset successfully"}
 
 @router.get("/user-role")
-async def get_user_role(token: str = oauth2_scheme):
-    # Verify the token
-    from jose import JWTError, jwt
-    
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        user_role: str = payload.get("role", "user")
-        
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    
-    return {"role": user_role, "user_id": user_id}
+async def get_user_role(payload: dict = Depends(get_token_payload)):
+    return {"role": payload.get("role", "user"), "user_id": payload["sub"]}
@@ -1,13 +1,20 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import List, Optional
 from app.services.supabase import supabase_service
+from app.services.pagination import wants_ndjson, stream_ndjson
 
 router = APIRouter()
 
 @router.get("/user/{user_id}", response_model=List[dict])
-async def get_user_calendar_events(user_id: str):
+async def get_user_calendar_events(request: Request, user_id: str):
     supabase = supabase_service.get_client()
-    events = supabase.table("calendar_events").select("*").eq("user_id", user_id).execute().data
+    
+    if wants_ndjson(request):
+        return await stream_ndjson(
+            lambda: supabase.table("calendar_events").select("*").eq("user_id", user_id), "start_time"
+        )
+    
+    events = (await supabase_service.execute(supabase.table("calendar_events").select("*").eq("user_id", user_id))).data
     
     return events
 
@@ -16,22 +23,22 @@ async def create_calendar_event(user_id: str, day: int, title: str, type: str =
     supabase = supabase_service.get_client()
     
     # Check if user exists
-    existing_user = supabase.table("users").select("id").eq("id", user_id).execute().data
+    existing_user = (await supabase_service.execute(supabase.table("users").select("id").eq("id", user_id))).data
     if not existing_user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Check if event already exists for this day
-    existing_event = supabase.table("calendar_events").select("id").eq("user_id", user_id).eq("day", day).execute().data
+    existing_event = (await supabase_service.execute(supabase.table("calendar_events").select("id").eq("user_id", user_id).eq("day", day))).data
     if existing_event:
         raise HTTPException(status_code=400, detail="Event already exists for this day")
     
     # Create event
-    new_event = supabase.table("calendar_events").insert({
+    new_event = (await supabase_service.execute(supabase.table("calendar_events").insert({
         "user_id": user_id,
         "day": day,
         "title": title,
         "type": type
-    }).execute().data[0]
+    }))).data[0]
     
     return new_event
 
@@ -40,9 +47,9 @@ async def update_calendar_event(user_id: str, day: int, title: str):
     supabase = supabase_service.get_client()
     
     # Update event
-    updated_event = supabase.table("calendar_events").update({
+    updated_event = (await supabase_service.execute(supabase.table("calendar_events").update({
         "title": title
-    }).eq("user_id", user_id).eq("day", day).execute().data
+    }).eq("user_id", user_id).eq("day", day))).data
     
     if not updated_event:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -54,7 +61,7 @@ async def delete_calendar_event(user_id: str, day: int):
     supabase = supabase_service.get_client()
     
     # Delete event
-    result = supabase.table("calendar_events").delete().eq("user_id", user_id).eq("day", day).execute()
+    result = await supabase_service.execute(supabase.table("calendar_events").delete().eq("user_id", user_id).eq("day", day))
     
     if not result.data:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -1,20 +1,31 @@
-from fastapi import APIRouter, HTTPException
+from collections import Counter
+from fastapi import APIRouter, HTTPException, Request
 from typing import List, Optional
-from app.services.supabase import supabase_service
+from app.schemas.batch import BatchResponse
+from app.schemas.checkin import CheckinCreate
+from app.services.supabase import supabase_service, APIError, FOREIGN_KEY_VIOLATION
+from app.services.batch import check_batch_size, insert_batch
+from app.services.pagination import wants_ndjson, stream_ndjson
+from app.services.heatmap import heatmap_service, parse_day
 
 router = APIRouter()
 
 @router.get("/user/{user_id}", response_model=List[dict])
-async def get_user_checkins(user_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None):
+async def get_user_checkins(request: Request, user_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None):
     supabase = supabase_service.get_client()
-    query = supabase.table("checkins").select("*").eq("user_id", user_id)
     
-    if start_date:
-        query = query.gte("date", start_date)
-    if end_date:
-        query = query.lte("date", end_date)
+    def build_query():
+        query = supabase.table("checkins").select("*").eq("user_id", user_id)
+        if start_date:
+            query = query.gte("date", start_date)
+        if end_date:
+            query = query.lte("date", end_date)
+        return query
     
-    checkins = query.order("date", desc=True).execute().data
+    if wants_ndjson(request):
+        return await stream_ndjson(build_query, "date")
+    
+    checkins = (await supabase_service.execute(build_query().order("date", desc=True))).data
     
     return checkins
 
@@ -22,22 +33,37 @@ async def get_user_checkins(user_id: str, start_date: Optional[str] = None, end_
 async def create_checkin(user_id: str, date: str, type: str, content: str, emoji: str):
     supabase = supabase_service.get_client()
     
-    # Check if user exists
-    existing_user = supabase.table("users").select("id").eq("id", user_id).execute().data
-    if not existing_user:
-        raise HTTPException(status_code=404, detail="User not found")
+    # Create checkin, relying on the user_id foreign key instead of checking first
+    try:
+        new_checkin = (await supabase_service.execute(supabase.table("checkins").insert({
+            "user_id": user_id,
+            "date": date,
+            "type": type,
+            "content": content,
+            "emoji": emoji
+        }))).data[0]
+    except APIError as e:
+        if e.code == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(status_code=404, detail="User not found")
+        raise
     
-    # Create checkin
-    new_checkin = supabase.table("checkins").insert({
-        "user_id": user_id,
-        "date": date,
-        "type": type,
-        "content": content,
-        "emoji": emoji
-    }).execute().data[0]
+    await heatmap_service.record(user_id, "checkin", parse_day(date))
     
     return new_checkin
 
+@router.post("/batch", response_model=BatchResponse)
+async def create_checkin_batch(request: List[CheckinCreate]):
+    check_batch_size(request)
+    
+    response, created = await insert_batch("checkins", [item.model_dump() for item in request])
+    
+    # One rollup call per (user, day) rather than per checkin
+    per_day = Counter((row["user_id"], parse_day(row["date"])) for row in created)
+    for (user_id, day), count in per_day.items():
+        await heatmap_service.record(user_id, "checkin", day, count)
+    
+    return response
+
 @router.put("/{checkin_id}", response_model=dict)
 async def update_checkin(checkin_id: str, content: Optional[str] = None, emoji: Optional[str] = None):
     supabase = supabase_service.get_client()
@@ -50,9 +76,9 @@ async def update_checkin(checkin_id: str, content: Optional[str] = None, emoji:
         update_data["emoji"] = emoji
     
     # Update checkin
-    updated_checkin = supabase.table("checkins").update(
+    updated_checkin = (await supabase_service.execute(supabase.table("checkins").update(
         update_data
-    ).eq("id", checkin_id).execute().data
+    ).eq("id", checkin_id))).data
     
     if not updated_checkin:
         raise HTTPException(status_code=404, detail="Checkin not found")
@@ -64,7 +90,7 @@ async def delete_checkin(checkin_id: str):
     supabase = supabase_service.get_client()
     
     # Delete checkin
-    result = supabase.table("checkins").delete().eq("id", checkin_id).execute()
+    result = await supabase_service.execute(supabase.table("checkins").delete().eq("id", checkin_id))
     
     if not result.data:
         raise HTTPException(status_code=404, detail="Checkin not found")
@@ -1,108 +1,184 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import List, Optional
-from app.schemas.content import ContentResponse, ContentCreate, ContentUpdate
-from app.services.supabase import supabase_service
+from app.schemas.content import ContentResponse, ContentCreate, ContentUpdate, ContentEngagement
+from app.schemas.batch import BatchResponse
+from app.services.supabase import supabase_service, is_uuid
+from app.services.pagination import paginate, set_next_cursor
+from app.services.cache import cache_service
+from app.services.search import search_index
+from app.services.counters import counter_service
+from app.services.trending import trending_engine
+from app.services.batch import check_batch_size, insert_batch
+from app.services.serialization import serialize_rows, serialize_row, parse_fields, select_columns
+from app.services.conditional import check_not_modified, probe_not_modified
+from app.services.compression import PrecompressedJSON
 
 router = APIRouter()
 
+ENGAGEMENT_COLUMNS = {"view": "views", "like": "likes", "share": "shares"}
+
 @router.get("/", response_model=List[ContentResponse])
 async def get_content(
+    response: Response,
     category: Optional[str] = None,
     limit: int = 10,
     offset: int = 0,
-    sort_by: str = "created_at"
+    cursor: Optional[str] = None,
+    sort_by: str = "created_at",
+    fields: Optional[str] = None
 ):
+    if sort_by not in ("views", "likes"):
+        sort_by = "created_at"
+    
+    projected = parse_fields(fields, ContentResponse, "content")
     supabase = supabase_service.get_client()
-    query = supabase.table("content").select("*")
+    query = supabase.table("content").select(select_columns(projected, sort_by))
     
     if category:
         query = query.eq("category", category)
     
-    if sort_by == "views":
-        query = query.order("views", desc=True)
-    elif sort_by == "likes":
-        query = query.order("likes", desc=True)
-    else:
-        query = query.order("created_at", desc=True)
-    
-    content = query.limit(limit).offset(offset).execute().data
+    content = (await supabase_service.execute(paginate(query, sort_by, limit, offset, cursor))).data
+    set_next_cursor(response, content, sort_by, limit)
     
-    return content
+    return serialize_rows(content, ContentResponse, response, projected)
+
+# Shown until the trending engine has collected enough engagement
+MOCK_HOTSPOTS = [
+    {"name": "量子计算", "top": "25%", "left": "30%", "color": "#a855f7"},
+    {"name": "生成式AI", "top": "45%", "left": "60%", "color": "#7f13ec"},
+    {"name": "神经网络", "top": "65%", "left": "35%", "color": "#3b82f6"},
+    {"name": "艺术哲学", "top": "15%", "left": "55%", "color": "#ec4899"},
+    {"name": "数字孪生", "top": "75%", "left": "55%", "color": "#3b82f6"},
+    {"name": "脑机接口", "top": "35%", "left": "15%", "color": "#f59e0b"},
+]
+
+MOCK_HOT_CHATS = [
+    {"id": 1, "topic": "DeepSeek-R1 的推理逻辑", "count": "1.2w", "trend": "up"},
+    {"id": 2, "topic": "碳基与硅基生命的边界", "count": "8.4k", "trend": "up"},
+    {"id": 3, "topic": "空间计算中的交互革命", "count": "6.2k", "trend": "steady"},
+    {"id": 4, "topic": "从原子到比特：物质数字化", "count": "4.8k", "trend": "up"},
+    {"id": 5, "topic": "后人类主义下的艺术创作", "count": "3.1k", "trend": "new"},
+]
+
+# Static fallbacks are rendered and compressed once
+MOCK_HOTSPOTS_RESPONSE = PrecompressedJSON(MOCK_HOTSPOTS)
+MOCK_HOT_CHATS_RESPONSE = PrecompressedJSON(MOCK_HOT_CHATS)
 
 @router.get("/hotspots", response_model=List[dict])
-async def get_hotspots():
-    # Return mock hotspots data
-    hotspots = [
-        {"name": "量子计算", "top": "25%", "left": "30%", "color": "#a855f7"},
-        {"name": "生成式AI", "top": "45%", "left": "60%", "color": "#7f13ec"},
-        {"name": "神经网络", "top": "65%", "left": "35%", "color": "#3b82f6"},
-        {"name": "艺术哲学", "top": "15%", "left": "55%", "color": "#ec4899"},
-        {"name": "数字孪生", "top": "75%", "left": "55%", "color": "#3b82f6"},
-        {"name": "脑机接口", "top": "35%", "left": "15%", "color": "#f59e0b"},
-    ]
-    return hotspots
+async def get_hotspots(request: Request):
+    return trending_engine.hotspots() or MOCK_HOTSPOTS_RESPONSE.response(request)
 
 @router.get("/hot-chats", response_model=List[dict])
-async def get_hot_chats():
-    # Return mock hot chats data
-    hot_chats = [
-        {"id": 1, "topic": "DeepSeek-R1 的推理逻辑", "count": "1.2w", "trend": "up"},
-        {"id": 2, "topic": "碳基与硅基生命的边界", "count": "8.4k", "trend": "up"},
-        {"id": 3, "topic": "空间计算中的交互革命", "count": "6.2k", "trend": "steady"},
-        {"id": 4, "topic": "从原子到比特：物质数字化", "count": "4.8k", "trend": "up"},
-        {"id": 5, "topic": "后人类主义下的艺术创作", "count": "3.1k", "trend": "new"},
-    ]
+async def get_hot_chats(request: Request, category: Optional[str] = None):
+    hot_chats = trending_engine.hot_chats(category)
+    if not hot_chats and not category:
+        return MOCK_HOT_CHATS_RESPONSE.response(request)
     return hot_chats
 
 @router.get("/{content_id}", response_model=ContentResponse)
-async def get_content_by_id(content_id: str):
+async def get_content_by_id(
+    request: Request,
+    response: Response,
+    content_id: str,
+    fields: Optional[str] = None
+):
+    projected = parse_fields(fields, ContentResponse, "content")
+    cached = await cache_service.get("content", content_id)
+    if cached is not None:
+        return check_not_modified(request, response, "content", cached, projected) or serialize_row(cached, ContentResponse, projected, response)
+    
+    # Revalidations are answered from an updated_at probe when the row is unchanged
+    not_modified = await probe_not_modified(request, "content", content_id, projected)
+    if not_modified is not None:
+        return not_modified
+    
     supabase = supabase_service.get_client()
-    content = supabase.table("content").select("*").eq("id", content_id).execute().data
+    content = (await supabase_service.execute(supabase.table("content").select(select_columns(projected, "updated_at")).eq("id", content_id))).data
     
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
     
-    return content[0]
+    # Only full rows are cached
+    if projected is None:
+        await cache_service.set("content", content_id, content[0])
+    return check_not_modified(request, response, "content", content[0], projected) or serialize_row(content[0], ContentResponse, projected, response)
 
 @router.post("/", response_model=ContentResponse)
 async def create_content(request: ContentCreate):
     supabase = supabase_service.get_client()
     
     # Get first user as author
-    user = supabase.table("users").select("id").limit(1).execute().data
+    user = (await supabase_service.execute(supabase.table("users").select("id").limit(1))).data
     author_id = user[0]["id"] if user else None
     
-    new_content = supabase.table("content").insert({
+    new_content = (await supabase_service.execute(supabase.table("content").insert({
         **request.model_dump(),
         "author_id": author_id
-    }).execute().data[0]
+    }))).data[0]
+    
+    search_index.add("content", new_content)
     
     return new_content
 
+@router.post("/batch", response_model=BatchResponse)
+async def create_content_batch(request: List[ContentCreate]):
+    check_batch_size(request)
+    supabase = supabase_service.get_client()
+    
+    # Get first user as author, once for the whole batch
+    user = (await supabase_service.execute(supabase.table("users").select("id").limit(1))).data
+    author_id = user[0]["id"] if user else None
+    
+    response, created = await insert_batch("content", [
+        {**item.model_dump(), "author_id": author_id} for item in request
+    ])
+    for row in created:
+        search_index.add("content", row)
+    
+    return response
+
 @router.put("/{content_id}", response_model=ContentResponse)
 async def update_content(content_id: str, request: ContentUpdate):
     supabase = supabase_service.get_client()
     
-    # Check if content exists
-    existing_content = supabase.table("content").select("id").eq("id", content_id).execute().data
-    if not existing_content:
+    # Update and check existence in one round trip
+    updated_content = (await supabase_service.execute(supabase.table("content").update(
+        request.model_dump(exclude_unset=True)
+    ).eq("id", content_id))).data
+    
+    if not updated_content:
         raise HTTPException(status_code=404, detail="Content not found")
     
-    updated_content = supabase.table("content").update(
-        request.model_dump(exclude_unset=True)
-    ).eq("id", content_id).execute().data[0]
+    await cache_service.invalidate("content", content_id)
+    search_index.add("content", updated_content[0])
+    trending_engine.update_metadata(updated_content[0])
     
-    return updated_content
+    return updated_content[0]
 
 @router.delete("/{content_id}")
 async def delete_content(content_id: str):
     supabase = supabase_service.get_client()
     
-    # Check if content exists
-    existing_content = supabase.table("content").select("id").eq("id", content_id).execute().data
-    if not existing_content:
+    # Delete and check existence in one round trip
+    result = await supabase_service.execute(supabase.table("content").delete().eq("id", content_id))
+    
+    if not result.data:
         raise HTTPException(status_code=404, detail="Content not found")
     
-    supabase.table("content").delete().eq("id", content_id).execute()
+    await cache_service.invalidate("content", content_id)
+    search_index.remove("content", content_id)
+    trending_engine.remove(content_id)
     
     return {"message": "Content deleted successfully"}
+
+@router.post("/{content_id}/engagement", status_code=202)
+async def record_engagement(content_id: str, request: ContentEngagement):
+    # Checked up front: a bad id would only fail later, in the batched flush
+    if not is_uuid(content_id):
+        raise HTTPException(status_code=404, detail="Content not found")
+    
+    # Buffered and flushed in batches, so hot content doesn't serialize on its row lock
+    await counter_service.increment("content", content_id, ENGAGEMENT_COLUMNS[request.type], request.count)
+    trending_engine.record(content_id, request.type, request.count)
+    
+    return {"message": "Engagement recorded"}
@@ -1,82 +1,143 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import Annotated, List, Optional
+from pydantic import Field
 from app.schemas.course import CourseResponse, CourseCreate, CourseUpdate, UserCourseResponse, UserCourseCreate, UserCourseUpdate
-from app.services.supabase import supabase_service
+from app.schemas.batch import BatchResponse
+from app.services.supabase import supabase_service, APIError, UNIQUE_VIOLATION, FOREIGN_KEY_VIOLATION
+from app.services.pagination import paginate, set_next_cursor, wants_ndjson, stream_ndjson
+from app.services.cache import cache_service
+from app.services.search import search_index
+from app.services.counters import counter_service
+from app.services.heatmap import heatmap_service
+from app.services.batch import check_batch_size, insert_batch
+from app.services.serialization import serialize_rows, serialize_row, parse_fields, select_columns
+from app.services.conditional import check_not_modified, probe_not_modified
+from app.services.compression import PrecompressedJSON
 
 router = APIRouter()
 
 @router.get("/", response_model=List[CourseResponse])
 async def get_courses(
+    response: Response,
     limit: int = 10,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
 ):
+    projected = parse_fields(fields, CourseResponse, "courses")
     supabase = supabase_service.get_client()
-    courses = supabase.table("courses").select("*").order("created_at", desc=True).limit(limit).offset(offset).execute().data
+    query = supabase.table("courses").select(select_columns(projected, "created_at"))
     
-    return courses
+    courses = (await supabase_service.execute(paginate(query, "created_at", limit, offset, cursor))).data
+    set_next_cursor(response, courses, "created_at", limit)
+    
+    return serialize_rows(courses, CourseResponse, response, projected)
+
+MOCK_COURSES = [
+    {"id": "1", "title": "量化分析进阶：模型与风控", "instructor": "Dr. Alan Chen", "progress": 45, "completed": False, "cover": "https://picsum.photos/id/180/400/300"},
+    {"id": "2", "title": "UI/UX 深度思维体系", "instructor": "Sarah Wang", "progress": 100, "completed": True, "cover": "https://picsum.photos/id/181/400/300"},
+    {"id": "3", "title": "现代物理学基础：量子力学", "instructor": "Prof. Zhao", "progress": 12, "completed": False, "cover": "https://picsum.photos/id/182/400/300"},
+]
+
+# Static, so rendered and compressed once
+MOCK_COURSES_RESPONSE = PrecompressedJSON(MOCK_COURSES)
 
 @router.get("/mock", response_model=List[dict])
-async def get_mock_courses():
-    # Return mock courses data
-    courses = [
-        {"id": "1", "title": "量化分析进阶：模型与风控", "instructor": "Dr. Alan Chen", "progress": 45, "completed": False, "cover": "https://picsum.photos/id/180/400/300"},
-        {"id": "2", "title": "UI/UX 深度思维体系", "instructor": "Sarah Wang", "progress": 100, "completed": True, "cover": "https://picsum.photos/id/181/400/300"},
-        {"id": "3", "title": "现代物理学基础：量子力学", "instructor": "Prof. Zhao", "progress": 12, "completed": False, "cover": "https://picsum.photos/id/182/400/300"},
-    ]
-    return courses
+async def get_mock_courses(request: Request):
+    return MOCK_COURSES_RESPONSE.response(request)
 
 @router.get("/{course_id}", response_model=CourseResponse)
-async def get_course_by_id(course_id: str):
+async def get_course_by_id(
+    request: Request,
+    response: Response,
+    course_id: str,
+    fields: Optional[str] = None
+):
+    projected = parse_fields(fields, CourseResponse, "courses")
+    cached = await cache_service.get("courses", course_id)
+    if cached is not None:
+        return check_not_modified(request, response, "courses", cached, projected) or serialize_row(cached, CourseResponse, projected, response)
+    
+    # Revalidations are answered from an updated_at probe when the row is unchanged
+    not_modified = await probe_not_modified(request, "courses", course_id, projected)
+    if not_modified is not None:
+        return not_modified
+    
     supabase = supabase_service.get_client()
-    course = supabase.table("courses").select("*").eq("id", course_id).execute().data
+    course = (await supabase_service.execute(supabase.table("courses").select(select_columns(projected, "updated_at")).eq("id", course_id))).data
     
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
-    return course[0]
+    # Only full rows are cached
+    if projected is None:
+        await cache_service.set("courses", course_id, course[0])
+    return check_not_modified(request, response, "courses", course[0], projected) or serialize_row(course[0], CourseResponse, projected, response)
 
 @router.post("/", response_model=CourseResponse)
 async def create_course(request: CourseCreate):
     supabase = supabase_service.get_client()
     
-    new_course = supabase.table("courses").insert({
+    new_course = (await supabase_service.execute(supabase.table("courses").insert({
         **request.model_dump()
-    }).execute().data[0]
+    }))).data[0]
+    
+    search_index.add("courses", new_course)
     
     return new_course
 
+@router.post("/batch", response_model=BatchResponse)
+async def create_course_batch(request: List[CourseCreate]):
+    check_batch_size(request)
+    
+    response, created = await insert_batch("courses", [item.model_dump() for item in request])
+    for row in created:
+        search_index.add("courses", row)
+    
+    return response
+
 @router.put("/{course_id}", response_model=CourseResponse)
 async def update_course(course_id: str, request: CourseUpdate):
     supabase = supabase_service.get_client()
     
-    # Check if course exists
-    existing_course = supabase.table("courses").select("id").eq("id", course_id).execute().data
-    if not existing_course:
+    # Update and check existence in one round trip
+    updated_course = (await supabase_service.execute(supabase.table("courses").update(
+        request.model_dump(exclude_unset=True)
+    ).eq("id", course_id))).data
+    
+    if not updated_course:
         raise HTTPException(status_code=404, detail="Course not found")
     
-    updated_course = supabase.table("courses").update(
-        request.model_dump(exclude_unset=True)
-    ).eq("id", course_id).execute().data[0]
+    await cache_service.invalidate("courses", course_id)
+    search_index.add("courses", updated_course[0])
     
-    return updated_course
+    return updated_course[0]
 
 @router.delete("/{course_id}")
 async def delete_course(course_id: str):
     supabase = supabase_service.get_client()
     
-    # Check if course exists
-    existing_course = supabase.table("courses").select("id").eq("id", course_id).execute().data
-    if not existing_course:
+    # Delete and check existence in one round trip
+    result = await supabase_service.execute(supabase.table("courses").delete().eq("id", course_id))
+    
+    if not result.data:
         raise HTTPException(status_code=404, detail="Course not found")
     
-    supabase.table("courses").delete().eq("id", course_id).execute()
+    await cache_service.invalidate("courses", course_id)
+    search_index.remove("courses", course_id)
     
     return {"message": "Course deleted successfully"}
 
 @router.get("/user/{user_id}", response_model=List[UserCourseResponse])
-async def get_user_courses(user_id: str):
+async def get_user_courses(request: Request, user_id: str):
     supabase = supabase_service.get_client()
-    user_courses = supabase.table("user_courses").select("*").eq("user_id", user_id).execute().data
+    
+    if wants_ndjson(request):
+        return await stream_ndjson(
+            lambda: supabase.table("user_courses").select("*").eq("user_id", user_id), "started_at"
+        )
+    
+    user_courses = (await supabase_service.execute(supabase.table("user_courses").select("*").eq("user_id", user_id))).data
     
     return user_courses
 
@@ -84,28 +145,25 @@ async def get_user_courses(user_id: str):
 async def enroll_course(request: UserCourseCreate):
     supabase = supabase_service.get_client()
     
-    # Check if user exists
-    existing_user = supabase.table("users").select("id").eq("id", request.user_id).execute().data
-    if not existing_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Check if course exists
-    existing_course = supabase.table("courses").select("id").eq("id", request.course_id).execute().data
-    if not existing_course:
-        raise HTTPException(status_code=404, detail="Course not found")
-    
-    # Check if user is already enrolled
-    existing_enrollment = supabase.table("user_courses").select("id").eq("user_id", request.user_id).eq("course_id", request.course_id).execute().data
-    if existing_enrollment:
-        raise HTTPException(status_code=400, detail="User is already enrolled in this course")
-    
-    # Enroll user
-    new_enrollment = supabase.table("user_courses").insert({
-        "user_id": request.user_id,
-        "course_id": request.course_id,
-        "progress": request.progress,
-        "completed": request.completed
-    }).execute().data[0]
+    # Enroll user, relying on the foreign keys and UNIQUE(user_id, course_id)
+    # constraint instead of checking first
+    try:
+        new_enrollment = (await supabase_service.execute(supabase.table("user_courses").insert({
+            "user_id": request.user_id,
+            "course_id": request.course_id,
+            "progress": request.progress,
+            "completed": request.completed
+        }))).data[0]
+    except APIError as e:
+        if e.code == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=400, detail="User is already enrolled in this course")
+        if e.code == FOREIGN_KEY_VIOLATION:
+            if "(course_id)" in (e.details or ""):
+                raise HTTPException(status_code=404, detail="Course not found")
+            raise HTTPException(status_code=404, detail="User not found")
+        raise
+    
+    await counter_service.increment("courses", request.course_id, "enrolled_count", 1)
     
     return new_enrollment
 
@@ -113,11 +171,6 @@ async def enroll_course(request: UserCourseCreate):
 async def update_progress(user_course_id: str, request: UserCourseUpdate):
     supabase = supabase_service.get_client()
     
-    # Check if user course exists
-    existing_user_course = supabase.table("user_courses").select("id").eq("id", user_course_id).execute().data
-    if not existing_user_course:
-        raise HTTPException(status_code=404, detail="User course not found")
-    
     # Prepare update data
     update_data = request.model_dump(exclude_unset=True)
     
@@ -125,21 +178,25 @@ async def update_progress(user_course_id: str, request: UserCourseUpdate):
     if update_data.get("completed"):
         update_data["completed_at"] = "NOW()"
     
-    updated_user_course = supabase.table("user_courses").update(
+    # Update and check existence in one round trip
+    updated_user_course = (await supabase_service.execute(supabase.table("user_courses").update(
         update_data
-    ).eq("id", user_course_id).execute().data[0]
+    ).eq("id", user_course_id))).data
+    
+    if not updated_user_course:
+        raise HTTPException(status_code=404, detail="User course not found")
+    
+    await heatmap_service.record(updated_user_course[0]["user_id"], "course_progress")
     
-    return updated_user_course
+    return updated_user_course[0]
 
 @router.get("/heatmap/{user_id}", response_model=List[int])
 async def get_heatmap_data(user_id: str):
-    # Return mock heatmap data
-    import random
-    heatmap_data = [random.randint(0, 4) for _ in range(120)]
-    return heatmap_data
+    # Daily levels for the last HEATMAP_DAYS days, oldest first
+    return await heatmap_service.get(user_id)
 
 @router.post("/heatmap/{user_id}")
-async def update_heatmap_data(user_id: str, data: List[int]):
-    # In a real app, you would store this data in the database
-    # For now, we'll just return a success message
+async def update_heatmap_data(user_id: str, data: List[Annotated[int, Field(ge=0, le=4)]]):
+    # Explicit levels for the days ending today; later activity recomputes a day's level
+    await heatmap_service.set_levels(user_id, data)
     return {"message": "Heatmap data updated successfully"}
@@ -0,0 +1,24 @@
+from fastapi import Depends, HTTPException
+from fastapi.security import OAuth2PasswordBearer
+from app.core.security import verify_token
+from app.services.revocation import revocation_service
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+
+# async: verification never blocks, so it skips the threadpool hop on every request
+async def get_token_payload(token: str = Depends(oauth2_scheme)) -> dict:
+    payload = verify_token(token)
+
+    # Password reset tokens are signed with the same key but are not access tokens
+    if payload is None or payload.get("sub") is None or payload.get("type") == "reset" \
+            or revocation_service.is_revoked(payload.get("jti")):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    return payload
+
+async def get_current_user_id(payload: dict = Depends(get_token_payload)) -> str:
+    return payload["sub"]
@@ -1,88 +1,188 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import List, Optional
 from app.schemas.event import EventResponse, EventCreate, EventUpdate, UserEventResponse, UserEventCreate
-from app.services.supabase import supabase_service
+from app.schemas.batch import BatchResponse
+from app.services.supabase import supabase_service, APIError, UNIQUE_VIOLATION, FOREIGN_KEY_VIOLATION
+from app.services.pagination import paginate, set_next_cursor, wants_ndjson, stream_ndjson
+from app.services.cache import cache_service
+from app.services.search import search_index
+from app.services.counters import counter_service
+from app.services.batch import check_batch_size, insert_batch
+from app.services.serialization import serialize_rows, serialize_row, parse_fields, select_columns
+from app.services.conditional import check_not_modified, probe_not_modified
+from app.services.compression import PrecompressedJSON
+from app.services.geo import geo_index
+from app.services.heatmap import heatmap_service
+from app.core.config import settings
 
 router = APIRouter()
 
+def event_row(event: dict) -> dict:
+    """Map API fields onto the events table; the API's date is stored as start_date."""
+    row = dict(event)
+    if "date" in row:
+        row["start_date"] = row.pop("date")
+    return row
+
+def event_response(row: dict) -> dict:
+    """The reverse of event_row(): expose start_date as the API's date."""
+    return {**row, "date": row.get("start_date")}
+
 @router.get("/", response_model=List[EventResponse])
 async def get_events(
+    response: Response,
     category: Optional[str] = None,
     limit: int = 10,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
 ):
+    projected = parse_fields(fields, EventResponse, "events")
     supabase = supabase_service.get_client()
-    query = supabase.table("events").select("*")
+    query = supabase.table("events").select(select_columns(projected, "created_at"))
     
     if category:
         query = query.eq("category", category)
     
-    events = query.order("created_at", desc=True).limit(limit).offset(offset).execute().data
+    events = (await supabase_service.execute(paginate(query, "created_at", limit, offset, cursor))).data
+    set_next_cursor(response, events, "created_at", limit)
     
-    return events
+    return serialize_rows([event_response(event) for event in events], EventResponse, response, projected)
+
+MOCK_EVENTS = [
+    {"id": "1", "title": "x²年度跨界知识论坛", "dist": 1.2, "cat": "学术会议", "date": "11月11日", "cover": "https://picsum.photos/id/111/400/300"},
+    {"id": "2", "title": "\"数字之境\"光影艺术展", "dist": 3.5, "cat": "艺术展览", "date": "11月15日", "cover": "https://picsum.photos/id/122/400/300"},
+    {"id": "3", "title": "独立创作者交流周", "dist": 0.8, "cat": "同城聚会", "date": "11月20日", "cover": "https://picsum.photos/id/133/400/300"},
+]
+
+# Static, so rendered and compressed once
+MOCK_EVENTS_RESPONSE = PrecompressedJSON(MOCK_EVENTS)
 
 @router.get("/mock", response_model=List[dict])
-async def get_mock_events():
-    # Return mock events data
-    events = [
-        {"id": "1", "title": "x²年度跨界知识论坛", "dist": 1.2, "cat": "学术会议", "date": "11月11日", "cover": "https://picsum.photos/id/111/400/300"},
-        {"id": "2", "title": "\"数字之境\"光影艺术展", "dist": 3.5, "cat": "艺术展览", "date": "11月15日", "cover": "https://picsum.photos/id/122/400/300"},
-        {"id": "3", "title": "独立创作者交流周", "dist": 0.8, "cat": "同城聚会", "date": "11月20日", "cover": "https://picsum.photos/id/133/400/300"},
-    ]
+async def get_mock_events(request: Request):
+    return MOCK_EVENTS_RESPONSE.response(request)
+
+@router.get("/nearby", response_model=List[EventResponse])
+async def get_nearby_events(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = Query(10.0, gt=0, le=settings.GEO_MAX_RADIUS_KM),
+    limit: int = Query(20, ge=1, le=100)
+):
+    # Nearest events within radius km, with distance computed for this request
+    nearest = geo_index.nearby(lat, lng, radius, limit)
+    if not nearest:
+        return []
+    
+    supabase = supabase_service.get_client()
+    rows = (await supabase_service.execute(
+        supabase.table("events").select("*").in_("id", [event_id for event_id, _ in nearest])
+    )).data
+    by_id = {str(row["id"]): row for row in rows}
+    
+    events = []
+    for event_id, distance in nearest:
+        row = by_id.get(event_id)
+        if row is not None:
+            events.append({**event_response(row), "distance": round(distance, 2)})
     return events
 
 @router.get("/{event_id}", response_model=EventResponse)
-async def get_event_by_id(event_id: str):
+async def get_event_by_id(
+    request: Request,
+    response: Response,
+    event_id: str,
+    fields: Optional[str] = None
+):
+    projected = parse_fields(fields, EventResponse, "events")
+    cached = await cache_service.get("events", event_id)
+    if cached is not None:
+        return check_not_modified(request, response, "events", cached, projected) or serialize_row(event_response(cached), EventResponse, projected, response)
+    
+    # Revalidations are answered from an updated_at probe when the row is unchanged
+    not_modified = await probe_not_modified(request, "events", event_id, projected)
+    if not_modified is not None:
+        return not_modified
+    
     supabase = supabase_service.get_client()
-    event = supabase.table("events").select("*").eq("id", event_id).execute().data
+    event = (await supabase_service.execute(supabase.table("events").select(select_columns(projected, "updated_at")).eq("id", event_id))).data
     
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    return event[0]
+    # Only full rows are cached
+    if projected is None:
+        await cache_service.set("events", event_id, event[0])
+    return check_not_modified(request, response, "events", event[0], projected) or serialize_row(event_response(event[0]), EventResponse, projected, response)
 
 @router.post("/", response_model=EventResponse)
 async def create_event(request: EventCreate):
     supabase = supabase_service.get_client()
     
-    new_event = supabase.table("events").insert({
-        **request.model_dump()
-    }).execute().data[0]
+    new_event = (await supabase_service.execute(supabase.table("events").insert(
+        event_row(request.model_dump())
+    ))).data[0]
+    
+    search_index.add("events", new_event)
+    geo_index.add(new_event)
     
-    return new_event
+    return event_response(new_event)
+
+@router.post("/batch", response_model=BatchResponse)
+async def create_event_batch(request: List[EventCreate]):
+    check_batch_size(request)
+    
+    response, created = await insert_batch("events", [event_row(item.model_dump()) for item in request])
+    for row in created:
+        search_index.add("events", row)
+        geo_index.add(row)
+    
+    return response
 
 @router.put("/{event_id}", response_model=EventResponse)
 async def update_event(event_id: str, request: EventUpdate):
     supabase = supabase_service.get_client()
     
-    # Check if event exists
-    existing_event = supabase.table("events").select("id").eq("id", event_id).execute().data
-    if not existing_event:
+    # Update and check existence in one round trip
+    updated_event = (await supabase_service.execute(supabase.table("events").update(
+        event_row(request.model_dump(exclude_unset=True))
+    ).eq("id", event_id))).data
+    
+    if not updated_event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    updated_event = supabase.table("events").update(
-        request.model_dump(exclude_unset=True)
-    ).eq("id", event_id).execute().data[0]
+    await cache_service.invalidate("events", event_id)
+    search_index.add("events", updated_event[0])
+    geo_index.add(updated_event[0])
     
-    return updated_event
+    return event_response(updated_event[0])
 
 @router.delete("/{event_id}")
 async def delete_event(event_id: str):
     supabase = supabase_service.get_client()
     
-    # Check if event exists
-    existing_event = supabase.table("events").select("id").eq("id", event_id).execute().data
-    if not existing_event:
+    # Delete and check existence in one round trip
+    result = await supabase_service.execute(supabase.table("events").delete().eq("id", event_id))
+    
+    if not result.data:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    supabase.table("events").delete().eq("id", event_id).execute()
+    await cache_service.invalidate("events", event_id)
+    search_index.remove("events", event_id)
+    geo_index.remove(event_id)
     
     return {"message": "Event deleted successfully"}
 
 @router.get("/user/{user_id}", response_model=List[UserEventResponse])
-async def get_user_events(user_id: str):
+async def get_user_events(request: Request, user_id: str):
     supabase = supabase_service.get_client()
-    user_events = supabase.table("user_events").select("*").eq("user_id", user_id).execute().data
+    
+    if wants_ndjson(request):
+        return await stream_ndjson(
+            lambda: supabase.table("user_events").select("*").eq("user_id", user_id), "registered_at"
+        )
+    
+    user_events = (await supabase_service.execute(supabase.table("user_events").select("*").eq("user_id", user_id))).data
     
     return user_events
 
@@ -90,26 +190,24 @@ async def get_user_events(user_id: str):
 async def book_event(request: UserEventCreate):
     supabase = supabase_service.get_client()
     
-    # Check if user exists
-    existing_user = supabase.table("users").select("id").eq("id", request.user_id).execute().data
-    if not existing_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Check if event exists
-    existing_event = supabase.table("events").select("id").eq("id", request.event_id).execute().data
-    if not existing_event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
-    # Check if user has already booked this event
-    existing_booking = supabase.table("user_events").select("id").eq("user_id", request.user_id).eq("event_id", request.event_id).execute().data
-    if existing_booking:
-        raise HTTPException(status_code=400, detail="User has already booked this event")
-    
-    # Book event
-    new_booking = supabase.table("user_events").insert({
-        "user_id": request.user_id,
-        "event_id": request.event_id
-    }).execute().data[0]
+    # Book event, relying on the foreign keys and UNIQUE(user_id, event_id)
+    # constraint instead of checking first
+    try:
+        new_booking = (await supabase_service.execute(supabase.table("user_events").insert({
+            "user_id": request.user_id,
+            "event_id": request.event_id
+        }))).data[0]
+    except APIError as e:
+        if e.code == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=400, detail="User has already booked this event")
+        if e.code == FOREIGN_KEY_VIOLATION:
+            if "(event_id)" in (e.details or ""):
+                raise HTTPException(status_code=404, detail="Event not found")
+            raise HTTPException(status_code=404, detail="User not found")
+        raise
+    
+    await counter_service.increment("events", request.event_id, "attendees_count", 1)
+    await heatmap_service.record(request.user_id, "event_booking")
     
     return new_booking
 
@@ -118,9 +216,11 @@ async def cancel_booking(user_id: str, event_id: str):
     supabase = supabase_service.get_client()
     
     # Cancel booking
-    result = supabase.table("user_events").delete().eq("user_id", user_id).eq("event_id", event_id).execute()
+    result = await supabase_service.execute(supabase.table("user_events").delete().eq("user_id", user_id).eq("event_id", event_id))
     
     if not result.data:
         raise HTTPException(status_code=404, detail="Booking not found")
     
+    await counter_service.increment("events", event_id, "attendees_count", -1)
+    
     return {"message": "Booking cancelled successfully"}
@@ -1,99 +1,157 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import List, Optional
 from app.schemas.group import GroupResponse, GroupCreate, GroupUpdate, GroupMemberResponse, GroupMemberCreate
-from app.services.supabase import supabase_service
+from app.schemas.batch import BatchResponse
+from app.services.supabase import supabase_service, APIError, UNIQUE_VIOLATION, FOREIGN_KEY_VIOLATION
+from app.services.pagination import paginate, set_next_cursor, wants_ndjson, stream_ndjson
+from app.services.cache import cache_service
+from app.services.search import search_index
+from app.services.counters import counter_service
+from app.services.batch import check_batch_size, insert_batch
+from app.services.serialization import serialize_rows, serialize_row, parse_fields, select_columns
+from app.services.conditional import check_not_modified, probe_not_modified
+from app.services.memberships import membership_service
+from app.api.deps import get_current_user_id
 
 router = APIRouter()
 
 @router.get("/", response_model=List[GroupResponse])
 async def get_groups(
+    response: Response,
     limit: int = 10,
     offset: int = 0,
-    sort_by: str = "members_count"
+    cursor: Optional[str] = None,
+    sort_by: str = "members_count",
+    fields: Optional[str] = None
 ):
-    supabase = supabase_service.get_client()
-    query = supabase.table("groups").select("*")
+    if sort_by != "created_at":
+        sort_by = "members_count"
     
-    if sort_by == "members_count":
-        query = query.order("members_count", desc=True)
-    elif sort_by == "created_at":
-        query = query.order("created_at", desc=True)
+    projected = parse_fields(fields, GroupResponse, "groups")
+    supabase = supabase_service.get_client()
+    query = supabase.table("groups").select(select_columns(projected, sort_by))
     
-    groups = query.limit(limit).offset(offset).execute().data
+    groups = (await supabase_service.execute(paginate(query, sort_by, limit, offset, cursor))).data
+    set_next_cursor(response, groups, sort_by, limit)
     
-    return groups
+    return serialize_rows(groups, GroupResponse, response, projected)
 
 @router.get("/my", response_model=List[GroupResponse])
-async def get_my_groups():
-    # Return mock data for my groups
-    from datetime import datetime
-    current_time = datetime.now().isoformat()
-    
-    my_groups = [
-        {"id": "1", "name": "量子计算研讨会", "members_count": 1200, "icon": "⚡", "created_at": current_time, "updated_at": current_time},
-        {"id": "2", "name": "生成式艺术实验室", "members_count": 840, "icon": "🎨", "created_at": current_time, "updated_at": current_time},
-        {"id": "3", "name": "现代哲学沙龙", "members_count": 3100, "icon": "🏛️", "created_at": current_time, "updated_at": current_time},
-    ]
-    return my_groups
+async def get_my_groups(
+    response: Response,
+    limit: int = 50,
+    offset: int = 0,
+    user_id: str = Depends(get_current_user_id)
+):
+    # Served from the materialized membership list and shared group summaries, no join
+    groups = await membership_service.get(user_id, limit, offset)
+    
+    return serialize_rows(groups, GroupResponse, response)
 
 @router.get("/{group_id}", response_model=GroupResponse)
-async def get_group_by_id(group_id: str):
+async def get_group_by_id(
+    request: Request,
+    response: Response,
+    group_id: str,
+    fields: Optional[str] = None
+):
+    projected = parse_fields(fields, GroupResponse, "groups")
+    cached = await cache_service.get("groups", group_id)
+    if cached is not None:
+        return check_not_modified(request, response, "groups", cached, projected) or serialize_row(cached, GroupResponse, projected, response)
+    
+    # Revalidations are answered from an updated_at probe when the row is unchanged
+    not_modified = await probe_not_modified(request, "groups", group_id, projected)
+    if not_modified is not None:
+        return not_modified
+    
     supabase = supabase_service.get_client()
-    group = supabase.table("groups").select("*").eq("id", group_id).execute().data
+    group = (await supabase_service.execute(supabase.table("groups").select(select_columns(projected, "updated_at")).eq("id", group_id))).data
     
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     
-    return group[0]
+    # Only full rows are cached
+    if projected is None:
+        await cache_service.set("groups", group_id, group[0])
+    return check_not_modified(request, response, "groups", group[0], projected) or serialize_row(group[0], GroupResponse, projected, response)
 
 @router.post("/", response_model=GroupResponse)
 async def create_group(request: GroupCreate):
     supabase = supabase_service.get_client()
     
-    new_group = supabase.table("groups").insert({
+    new_group = (await supabase_service.execute(supabase.table("groups").insert({
         **request.model_dump()
-    }).execute().data[0]
+    }))).data[0]
+    
+    search_index.add("groups", new_group)
     
     return new_group
 
+@router.post("/batch", response_model=BatchResponse)
+async def create_group_batch(request: List[GroupCreate]):
+    check_batch_size(request)
+    
+    response, created = await insert_batch("groups", [item.model_dump() for item in request])
+    for row in created:
+        search_index.add("groups", row)
+    
+    return response
+
 @router.put("/{group_id}", response_model=GroupResponse)
 async def update_group(group_id: str, request: GroupUpdate):
     supabase = supabase_service.get_client()
     
-    # Check if group exists
-    existing_group = supabase.table("groups").select("id").eq("id", group_id).execute().data
-    if not existing_group:
+    # Update and check existence in one round trip
+    updated_group = (await supabase_service.execute(supabase.table("groups").update(
+        request.model_dump(exclude_unset=True)
+    ).eq("id", group_id))).data
+    
+    if not updated_group:
         raise HTTPException(status_code=404, detail="Group not found")
     
-    updated_group = supabase.table("groups").update(
-        request.model_dump(exclude_unset=True)
-    ).eq("id", group_id).execute().data[0]
+    await cache_service.invalidate("groups", group_id)
+    search_index.add("groups", updated_group[0])
+    membership_service.update_group(updated_group[0])
     
-    return updated_group
+    return updated_group[0]
 
 @router.delete("/{group_id}")
 async def delete_group(group_id: str):
     supabase = supabase_service.get_client()
     
-    # Check if group exists
-    existing_group = supabase.table("groups").select("id").eq("id", group_id).execute().data
-    if not existing_group:
+    # Delete and check existence in one round trip
+    result = await supabase_service.execute(supabase.table("groups").delete().eq("id", group_id))
+    
+    if not result.data:
         raise HTTPException(status_code=404, detail="Group not found")
     
-    supabase.table("groups").delete().eq("id", group_id).execute()
+    await cache_service.invalidate("groups", group_id)
+    search_index.remove("groups", group_id)
+    membership_service.remove_group(group_id)
     
     return {"message": "Group deleted successfully"}
 
 @router.get("/{group_id}/members", response_model=List[GroupMemberResponse])
-async def get_group_members(group_id: str):
+async def get_group_members(request: Request, group_id: str):
     supabase = supabase_service.get_client()
     
-    # Check if group exists
-    existing_group = supabase.table("groups").select("id").eq("id", group_id).execute().data
-    if not existing_group:
-        raise HTTPException(status_code=404, detail="Group not found")
+    # Only an empty result needs the extra existence check
+    async def check_group_exists():
+        existing_group = (await supabase_service.execute(supabase.table("groups").select("id").eq("id", group_id))).data
+        if not existing_group:
+            raise HTTPException(status_code=404, detail="Group not found")
     
-    members = supabase.table("group_members").select("*").eq("group_id", group_id).execute().data
+    if wants_ndjson(request):
+        return await stream_ndjson(
+            lambda: supabase.table("group_members").select("*").eq("group_id", group_id), "joined_at",
+            on_empty=check_group_exists
+        )
+    
+    members = (await supabase_service.execute(supabase.table("group_members").select("*").eq("group_id", group_id))).data
+    
+    if not members:
+        await check_group_exists()
     
     return members
 
@@ -101,32 +159,25 @@ async def get_group_members(group_id: str):
 async def add_group_member(group_id: str, request: GroupMemberCreate):
     supabase = supabase_service.get_client()
     
-    # Check if group exists
-    existing_group = supabase.table("groups").select("id").eq("id", group_id).execute().data
-    if not existing_group:
-        raise HTTPException(status_code=404, detail="Group not found")
-    
-    # Check if user exists
-    existing_user = supabase.table("users").select("id").eq("id", request.user_id).execute().data
-    if not existing_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Check if user is already a member
-    existing_member = supabase.table("group_members").select("id").eq("group_id", group_id).eq("user_id", request.user_id).execute().data
-    if existing_member:
-        raise HTTPException(status_code=400, detail="User is already a member of this group")
-    
-    # Add member
-    new_member = supabase.table("group_members").insert({
-        "group_id": group_id,
-        "user_id": request.user_id,
-        "is_admin": request.is_admin
-    }).execute().data[0]
-    
-    # Update group members count
-    supabase.table("groups").update({
-        "members_count": existing_group[0].get("members_count", 0) + 1
-    }).eq("id", group_id).execute()
+    # Add member, relying on the foreign keys and UNIQUE(group_id, user_id)
+    # constraint instead of checking first
+    try:
+        new_member = (await supabase_service.execute(supabase.table("group_members").insert({
+            "group_id": group_id,
+            "user_id": request.user_id,
+            "is_admin": request.is_admin
+        }))).data[0]
+    except APIError as e:
+        if e.code == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=400, detail="User is already a member of this group")
+        if e.code == FOREIGN_KEY_VIOLATION:
+            if "(group_id)" in (e.details or ""):
+                raise HTTPException(status_code=404, detail="Group not found")
+            raise HTTPException(status_code=404, detail="User not found")
+        raise
+    
+    await counter_service.increment("groups", group_id, "members_count", 1)
+    membership_service.add(request.user_id, group_id)
     
     return new_member
 
@@ -134,20 +185,16 @@ async def add_group_member(group_id: str, request: GroupMemberCreate):
 async def remove_group_member(group_id: str, user_id: str):
     supabase = supabase_service.get_client()
     
-    # Check if group exists
-    existing_group = supabase.table("groups").select("id").eq("id", group_id).execute().data
-    if not existing_group:
-        raise HTTPException(status_code=404, detail="Group not found")
-    
     # Remove member
-    result = supabase.table("group_members").delete().eq("group_id", group_id).eq("user_id", user_id).execute()
+    result = await supabase_service.execute(supabase.table("group_members").delete().eq("group_id", group_id).eq("user_id", user_id))
     
     if not result.data:
+        existing_group = (await supabase_service.execute(supabase.table("groups").select("id").eq("id", group_id))).data
+        if not existing_group:
+            raise HTTPException(status_code=404, detail="Group not found")
         raise HTTPException(status_code=404, detail="User is not a member of this group")
     
-    # Update group members count
-    supabase.table("groups").update({
-        "members_count": max(0, existing_group[0].get("members_count", 0) - 1)
-    }).eq("id", group_id).execute()
+    await counter_service.increment("groups", group_id, "members_count", -1)
+    membership_service.remove(user_id, group_id)
     
     return {"message": "Member removed successfully"}
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from app.services.search import search_index, SEARCH_TABLES
+
+router = APIRouter()
+
+@router.get("/", response_model=List[dict])
+async def search(
+    q: str,
+    types: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    prefix: bool = True
+):
+    tables = types.split(",") if types else None
+    if tables and any(table not in SEARCH_TABLES for table in tables):
+        raise HTTPException(status_code=400, detail=f"types must be a subset of {', '.join(SEARCH_TABLES)}")
+    
+    return search_index.search(q, tables, limit, prefix)
+
+@router.get("/stats")
+async def search_stats():
+    return search_index.stats()
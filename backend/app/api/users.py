@@ -1,64 +1,86 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Response
+from typing import List, Optional
 from app.schemas.user import UserResponse, UserUpdate, UserWithRelations
-from app.services.supabase import supabase_service
+from app.services.supabase import supabase_service, is_uuid
+from app.services.pagination import paginate, set_next_cursor
+from app.services.cache import cache_service
+from app.api.deps import get_current_user_id
+from app.services.serialization import serialize_rows
 
 router = APIRouter()
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user():
-    # In a real app, you would get the user from the JWT token
-    # For now, we'll return a mock user
+async def get_current_user(user_id: str = Depends(get_current_user_id)):
+    # Mock login tokens carry a non-UUID sub with no users row behind it
+    if not is_uuid(user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    user = await cache_service.get("users", user_id)
+    if user is not None:
+        return user
+    
     supabase = supabase_service.get_client()
-    user = supabase.table("users").select("*").limit(1).execute().data
+    user = (await supabase_service.execute(supabase.table("users").select("*").eq("id", user_id))).data
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    await cache_service.set("users", user_id, user[0])
     return user[0]
 
 @router.get("/{user_id}", response_model=UserWithRelations)
 async def get_user(user_id: str):
-    supabase = supabase_service.get_client()
-    user = supabase.table("users").select("*").eq("id", user_id).execute().data
-    
-    if not user:
+    if not is_uuid(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
+    user_with_relations = await cache_service.get("users", user_id)
+    
+    if user_with_relations is None:
+        supabase = supabase_service.get_client()
+        user = (await supabase_service.execute(supabase.table("users").select("*").eq("id", user_id))).data
+        
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        user_with_relations = user[0]
+        await cache_service.set("users", user_id, user_with_relations)
+    
     # Add mock relations data
-    user_with_relations = user[0]
     user_with_relations["is_following"] = False
     user_with_relations["is_friend"] = False
     
     return user_with_relations
 
 @router.put("/me", response_model=UserResponse)
-async def update_current_user(request: UserUpdate):
-    # In a real app, you would get the user from the JWT token
-    # For now, we'll update the first user
-    supabase = supabase_service.get_client()
-    user = supabase.table("users").select("id").limit(1).execute().data
-    
-    if not user:
+async def update_current_user(request: UserUpdate, user_id: str = Depends(get_current_user_id)):
+    if not is_uuid(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    user_id = user[0]["id"]
+    supabase = supabase_service.get_client()
     
-    # Update user
-    updated_user = supabase.table("users").update(
+    # Update and check existence in one round trip
+    updated_user = (await supabase_service.execute(supabase.table("users").update(
         request.model_dump(exclude_unset=True)
-    ).eq("id", user_id).execute().data[0]
+    ).eq("id", user_id))).data
     
-    return updated_user
+    if not updated_user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    await cache_service.invalidate("users", user_id)
+    
+    return updated_user[0]
 
 @router.get("/", response_model=List[UserWithRelations])
-async def get_users(limit: int = 10, offset: int = 0):
+async def get_users(response: Response, limit: int = 10, offset: int = 0, cursor: Optional[str] = None):
     supabase = supabase_service.get_client()
-    users = supabase.table("users").select("*").limit(limit).offset(offset).execute().data
+    query = supabase.table("users").select("*")
+    
+    users = (await supabase_service.execute(paginate(query, "created_at", limit, offset, cursor))).data
+    set_next_cursor(response, users, "created_at", limit)
     
     # Add mock relations data
     for user in users:
         user["is_following"] = False
         user["is_friend"] = False
     
-    return users
+    return serialize_rows(users, UserWithRelations, response)
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     # Application settings
@@ -9,11 +9,134 @@ class Settings(BaseSettings):
     # Supabase settings
     SUPABASE_URL: str
     SUPABASE_KEY: str
+    SUPABASE_MAX_CONCURRENCY: int = 16
+    
+    # Supabase HTTP connection pool settings
+    SUPABASE_MAX_CONNECTIONS: int = 32
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = 16
+    SUPABASE_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_CONNECT_TIMEOUT: float = 5.0
+    SUPABASE_READ_TIMEOUT: float = 10.0
+    SUPABASE_TABLE_READ_TIMEOUTS: Dict[str, float] = {}
+    SUPABASE_HTTP2: bool = False
+    SUPABASE_RETRIES: int = 0
+    SUPABASE_BACKEND: str = "supabase"  # "supabase" or "memory" (in-process, for offline and load testing)
+    SUPABASE_MEMORY_LATENCY_MS: float = 0.0  # Simulated round trip for the memory backend
+    SUPABASE_SINGLE_FLIGHT_ENABLED: bool = True  # Concurrent identical reads share one call
+    
+    # Cache settings
+    CACHE_ENABLED: bool = True
+    CACHE_BACKEND: str = "memory"
+    CACHE_URL: Optional[str] = None
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_DEFAULT_TTL: float = 60.0
+    CACHE_TTLS: Dict[str, float] = {
+        "content": 60.0,
+        "groups": 60.0,
+        "events": 60.0,
+        "courses": 300.0,
+        "users": 30.0
+    }
+    
+    # Counter settings
+    COUNTER_FLUSH_INTERVAL: float = 1.0
+    COUNTER_BUFFERED_COLUMNS: List[str] = [
+        "groups.members_count",
+        "events.attendees_count",
+        "courses.enrolled_count",
+        "content.views",
+        "content.likes",
+        "content.shares"
+    ]
+    # Each process appends to <path>.<pid>; see CounterSpool
+    COUNTER_SPOOL_PATH: Optional[str] = "counter_spool.jsonl"
+    
+    # Trending settings
+    TRENDING_REFRESH_INTERVAL: float = 30.0
+    TRENDING_SHORT_HALF_LIFE: float = 3600.0
+    TRENDING_LONG_HALF_LIFE: float = 86400.0
+    TRENDING_NEW_SECONDS: float = 86400.0
+    TRENDING_UP_RATIO: float = 1.2
+    TRENDING_TOP_K: int = 10
+    TRENDING_MAX_ITEMS: int = 10000
+    TRENDING_BOOTSTRAP_LIMIT: int = 1000
+    TRENDING_METADATA_BATCH: int = 200
+    TRENDING_WEIGHTS: Dict[str, float] = {
+        "view": 1.0,
+        "like": 3.0,
+        "comment": 4.0,
+        "share": 5.0
+    }
+    
+    # Search settings
+    SEARCH_BOOTSTRAP_BATCH: int = 1000
+    SEARCH_MAX_PREFIX_TERMS: int = 50
+    
+    # Geo index settings (0.05 degrees is roughly 5.5km of latitude)
+    GEO_CELL_DEGREES: float = 0.05
+    GEO_BOOTSTRAP_BATCH: int = 1000
+    GEO_MAX_RADIUS_KM: float = 500.0
+    
+    # Batch insert settings
+    BATCH_MAX_SIZE: int = 1000
+    BATCH_CHUNK_SIZE: int = 100
+    
+    # NDJSON streaming settings
+    STREAM_PAGE_SIZE: int = 1000
+    
+    # Activity heatmap settings; a day reaches level N once it has
+    # HEATMAP_LEVEL_THRESHOLDS[N - 1] activities
+    HEATMAP_DAYS: int = 120
+    HEATMAP_LEVEL_THRESHOLDS: List[int] = [1, 2, 4, 7]
+    HEATMAP_CACHE_MAX_USERS: int = 10000
+    HEATMAP_CACHE_TTL: float = 300.0
+    
+    # "My groups" settings: per-user membership lists and shared group summaries
+    MEMBERSHIP_CACHE_MAX_USERS: int = 10000
+    MEMBERSHIP_CACHE_TTL: float = 300.0
+    GROUP_SUMMARY_CACHE_MAX_ENTRIES: int = 5000
+    GROUP_SUMMARY_CACHE_TTL: float = 60.0
+    GROUP_SUMMARY_BATCH_SIZE: int = 100
+    
+    # Return list rows without per-row Pydantic revalidation unless strict
+    RESPONSE_VALIDATION_STRICT: bool = False
+    
+    # HTTP caching settings; max-age per resource, revalidated with ETags after that
+    HTTP_CONDITIONAL_ENABLED: bool = True
+    HTTP_MAX_AGES: Dict[str, int] = {
+        "content": 30,
+        "groups": 60,
+        "events": 30,
+        "courses": 300,
+        "users": 0
+    }
+    
+    # Compression settings; br and zstd are used when brotli / zstandard are installed
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 500
+    COMPRESSION_ENCODINGS: List[str] = ["br", "zstd", "gzip"]  # Preference order
+    COMPRESSION_LEVELS: Dict[str, int] = {"gzip": 6, "br": 4, "zstd": 3}
+    COMPRESSION_CONTENT_TYPES: List[str] = ["application/json", "application/x-ndjson", "text/"]
+    
+    # Profiling settings
+    METRICS_ENABLED: bool = True
+    METRICS_LATENCY_BUCKETS: List[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+    SERVER_TIMING_ENABLED: bool = False
+    SLOW_REQUEST_THRESHOLD_MS: float = 1000.0  # 0 disables the slow request log
     
     # JWT settings
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    REVOCATION_BACKEND: str = "memory"  # "memory" or "supabase"
+    REVOCATION_SYNC_INTERVAL: float = 5.0
+    
+    # Password hashing settings
+    BCRYPT_ROUNDS: int = 12
+    HASHER_WORKERS: Optional[int] = None  # Defaults to the CPU count
+    HASHER_MAX_PENDING: int = 64
+    HASHER_RETRY_AFTER: int = 1
     
     class Config:
         env_file = ".env"
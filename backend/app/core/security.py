@@ -1,10 +1,23 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+import hashlib
+import threading
+import time
+import uuid
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min/max to the configured cost makes any other cost "needs update",
+# so verify_and_update() rehashes when BCRYPT_ROUNDS is raised or lowered
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -13,19 +26,84 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # jti identifies the token so logout can revoke it before it expires
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+class VerifiedTokenCache:
+    """Bounded LRU of decoded token payloads, keyed by a hash of the token.
+
+    Entries are dropped once the token's exp has passed, so a cache hit is
+    exactly as valid as re-verifying the signature. A lock guards the LRU
+    so verify_token() stays safe when called from worker threads.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self.key(token)
+        with self.lock:
+            payload = self.entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+
+            exp = payload.get("exp")
+            if exp is not None and exp <= time.time():
+                del self.entries[key]
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def set(self, token: str, payload: dict):
+        key = self.key(token)
+        with self.lock:
+            self.entries[key] = payload
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+verified_tokens = VerifiedTokenCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+
 def verify_token(token: str) -> Optional[dict]:
+    payload = verified_tokens.get(token)
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
         return None
 
+    verified_tokens.set(token, payload)
+    return dict(payload)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password, returning a new hash if the stored one uses an outdated cost."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
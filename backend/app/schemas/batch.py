@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: Literal["created", "failed"]
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BatchItemResult]
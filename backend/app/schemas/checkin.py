@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+class CheckinCreate(BaseModel):
+    user_id: str
+    date: str
+    type: str
+    content: str
+    emoji: str
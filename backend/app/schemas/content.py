@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
 from datetime import datetime
 
 class ContentBase(BaseModel):
@@ -27,3 +27,7 @@ class ContentResponse(ContentBase):
     
     class Config:
         from_attributes = True
+
+class ContentEngagement(BaseModel):
+    type: Literal["view", "like", "share"]
+    count: int = Field(default=1, ge=1, le=1000)
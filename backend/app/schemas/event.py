@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 
 class EventBase(BaseModel):
@@ -7,6 +7,7 @@ class EventBase(BaseModel):
     category: Optional[str] = None
     date: Optional[str] = None
     location: Optional[str] = None
+    location_coords: Optional[Dict[str, float]] = None
     distance: Optional[float] = None
     cover: Optional[str] = None
 
@@ -18,6 +19,7 @@ class EventUpdate(BaseModel):
     category: Optional[str] = None
     date: Optional[str] = None
     location: Optional[str] = None
+    location_coords: Optional[Dict[str, float]] = None
     distance: Optional[float] = None
     cover: Optional[str] = None
 
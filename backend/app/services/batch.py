@@ -0,0 +1,58 @@
+from typing import List, Tuple
+from fastapi import HTTPException
+from app.core.config import settings
+from app.services.supabase import supabase_service, APIError, UNIQUE_VIOLATION, FOREIGN_KEY_VIOLATION
+
+def check_batch_size(items: list):
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > settings.BATCH_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {settings.BATCH_MAX_SIZE} items")
+
+def describe_error(e: APIError) -> str:
+    if e.code == UNIQUE_VIOLATION:
+        return "Already exists"
+    if e.code == FOREIGN_KEY_VIOLATION:
+        return "Referenced row not found"
+    return e.message or "Insert failed"
+
+async def insert_batch(table: str, rows: List[dict]) -> Tuple[dict, List[dict]]:
+    """Insert rows in multi-row chunks of BATCH_CHUNK_SIZE.
+
+    Returns the response body with per-item status, plus the inserted rows
+    for post-insert hooks. A multi-row insert is all-or-nothing, so if a
+    chunk is rejected its rows are retried one by one to find which items
+    failed and still create the rest.
+    """
+    supabase = supabase_service.get_client()
+    chunk_size = settings.BATCH_CHUNK_SIZE
+    results = []
+    created_rows = []
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            inserted = (await supabase_service.execute(supabase.table(table).insert(chunk))).data
+            outcomes = [(row, None) for row in inserted]
+        except APIError:
+            outcomes = []
+            for row in chunk:
+                try:
+                    outcomes.append(((await supabase_service.execute(supabase.table(table).insert(row))).data[0], None))
+                except APIError as e:
+                    outcomes.append((None, describe_error(e)))
+
+        # PostgREST returns inserted rows in request order
+        for offset, (row, error) in enumerate(outcomes):
+            if row is None:
+                results.append({"index": start + offset, "status": "failed", "error": error})
+            else:
+                results.append({"index": start + offset, "status": "created", "id": str(row["id"])})
+                created_rows.append(row)
+
+    response = {
+        "created": len(created_rows),
+        "failed": len(results) - len(created_rows),
+        "results": results
+    }
+    return response, created_rows
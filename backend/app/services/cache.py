@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from typing import Any, Optional
+from app.core.config import settings
+import json
+import time
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            self.evictions += 1
+            return None
+
+        self.entries.move_to_end(key)
+        # Handlers add fields to the rows they return, so hand out copies
+        return dict(value)
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self.entries[key] = (dict(value), time.monotonic() + ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str):
+        self.entries.pop(key, None)
+
+    def size(self) -> int:
+        return len(self.entries)
+
+class RedisCacheBackend:
+    """Shared cache for multi-worker deployments, stored as JSON in Redis."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url)
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self.redis.get(key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self.redis.set(key, json.dumps(value), px=int(ttl * 1000))
+
+    async def delete(self, key: str):
+        await self.redis.delete(key)
+
+    def size(self) -> Optional[int]:
+        return None
+
+class CacheService:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.backend = MemoryCacheBackend(settings.CACHE_MAX_ENTRIES)
+
+        if settings.CACHE_BACKEND == "redis":
+            try:
+                self.backend = RedisCacheBackend(settings.CACHE_URL)
+            except Exception as e:
+                print(f"Redis cache initialization failed: {e}")
+                print("Using in-process cache")
+
+    def key(self, resource: str, resource_id: str) -> str:
+        return f"{resource}:{resource_id}"
+
+    def ttl(self, resource: str) -> float:
+        return settings.CACHE_TTLS.get(resource, settings.CACHE_DEFAULT_TTL)
+
+    async def get(self, resource: str, resource_id: str) -> Optional[Any]:
+        if not settings.CACHE_ENABLED:
+            return None
+
+        value = await self.backend.get(self.key(resource, resource_id))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, resource: str, resource_id: str, value: Any):
+        if settings.CACHE_ENABLED:
+            await self.backend.set(self.key(resource, resource_id), value, self.ttl(resource))
+
+    async def invalidate(self, resource: str, resource_id: str):
+        await self.backend.delete(self.key(resource, resource_id))
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.backend.evictions,
+            "size": self.backend.size()
+        }
+
+# Create a singleton instance
+cache_service = CacheService()
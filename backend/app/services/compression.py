@@ -0,0 +1,205 @@
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.services.conditional import body_etag, etag_matches
+from app.services.serialization import FastJSONResponse
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+class BrotliEncoder:
+    def __init__(self, level: int):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+ENCODERS = {"gzip": GzipEncoder}
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+if zstandard is not None:
+    ENCODERS["zstd"] = ZstdEncoder
+
+# Highest levels, for payloads compressed once and served many times
+MAX_LEVELS = {"gzip": 9, "br": 11, "zstd": 19}
+
+@lru_cache(maxsize=256)
+def negotiate(accept_encoding: str) -> Tuple[str, ...]:
+    """Encodings the client accepts that are installed, in COMPRESSION_ENCODINGS order."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+
+    return tuple(
+        encoding for encoding in settings.COMPRESSION_ENCODINGS
+        if encoding in ENCODERS and accepted.get(encoding, accepted.get("*", 0.0)) > 0
+    )
+
+def compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").split(";")[0].strip()
+    return any(content_type.startswith(allowed) for allowed in settings.COMPRESSION_CONTENT_TYPES)
+
+def compress(encoding: str, data: bytes, level: Optional[int] = None) -> bytes:
+    encoder = ENCODERS[encoding](level if level is not None else settings.COMPRESSION_LEVELS[encoding])
+    return encoder.compress(data) + encoder.finish()
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding the client accepts.
+
+    Only allowlisted content types at or above COMPRESSION_MIN_SIZE are
+    compressed. Streamed responses are compressed chunk by chunk and
+    flushed after each one, so NDJSON pages still reach the client as
+    they are produced.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        encodings = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if not encodings:
+            await self.app(scope, receive, send)
+            return
+
+        await CompressionResponder(self.app, encodings[0])(scope, receive, send)
+
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str):
+        self.app = app
+        self.encoding = encoding
+        self.send = None
+        self.start: Optional[Message] = None
+        self.encoder = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message):
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            length = headers.get("content-length")
+            if (message["status"] in (204, 304) or not compressible(headers)
+                    or (length is not None and int(length) < settings.COMPRESSION_MIN_SIZE)):
+                await self.send(message)
+            else:
+                # Hold the start message until the first chunk shows whether to compress
+                self.start = message
+            return
+
+        if message["type"] != "http.response.body" or (self.start is None and self.encoder is None):
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            start, self.start = self.start, None
+            if not more_body and len(body) < settings.COMPRESSION_MIN_SIZE:
+                await self.send(start)
+                await self.send(message)
+                return
+
+            self.encoder = ENCODERS[self.encoding](settings.COMPRESSION_LEVELS[self.encoding])
+            headers = MutableHeaders(raw=list(start["headers"]))
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                body = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(body))
+                start["headers"] = headers.raw
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+
+            del headers["Content-Length"]
+            start["headers"] = headers.raw
+            await self.send(start)
+
+        data = self.encoder.compress(body) + (self.encoder.flush() if more_body else self.encoder.finish())
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+class PrecompressedJSON:
+    """A static JSON payload rendered and compressed once, at startup."""
+
+    def __init__(self, content: Any):
+        self.body = FastJSONResponse(content).body
+        self.etag = body_etag(self.body)
+        self.variants: Dict[str, bytes] = {}
+        # Compressing costs nothing per request here, so any saving is worth it regardless of size
+        for encoding in ENCODERS:
+            compressed = compress(encoding, self.body, MAX_LEVELS[encoding])
+            if len(compressed) < len(self.body):
+                self.variants[encoding] = compressed
+
+    def response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding"}
+        if etag_matches(request, self.etag):
+            return Response(status_code=304, headers=headers)
+
+        body = self.body
+        if settings.COMPRESSION_ENABLED and self.variants:
+            for encoding in negotiate(request.headers.get("accept-encoding", "")):
+                if encoding in self.variants:
+                    body = self.variants[encoding]
+                    headers["Content-Encoding"] = encoding
+                    break
+        return Response(content=body, media_type="application/json", headers=headers)
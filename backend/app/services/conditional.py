@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+from fastapi import Request, Response
+from app.core.config import settings
+from app.services.supabase import supabase_service
+import hashlib
+
+def cache_control(resource: str) -> str:
+    # Every API response is per-user (authenticated), so never let shared caches keep it
+    return f"private, max-age={settings.HTTP_MAX_AGES.get(resource, 0)}, must-revalidate"
+
+def row_etag(row: dict, fields: Optional[Tuple[str, ...]] = None) -> str:
+    """Weak ETag from id and updated_at, which the update triggers bump on every write."""
+    source = f"{row['id']}|{row.get('updated_at')}|{','.join(fields or ())}"
+    return f'W/"{hashlib.blake2b(source.encode(), digest_size=12).hexdigest()}"'
+
+def body_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+def last_modified(row: dict) -> Optional[datetime]:
+    try:
+        moment = datetime.fromisoformat(row["updated_at"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole-second precision
+    return moment.astimezone(timezone.utc).replace(microsecond=0)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    return etag.removeprefix("W/") in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+def is_not_modified(request: Request, etag: str, modified: Optional[datetime]) -> bool:
+    if "if-none-match" in request.headers:
+        # If-Modified-Since is ignored when If-None-Match is present (RFC 9110 13.1.3)
+        return etag_matches(request, etag)
+
+    since = request.headers.get("if-modified-since")
+    if not since or modified is None:
+        return False
+    try:
+        return modified <= parsedate_to_datetime(since)
+    except (TypeError, ValueError):
+        return False
+
+def validator_headers(resource: str, etag: str, modified: Optional[datetime]) -> dict:
+    headers = {"ETag": etag, "Cache-Control": cache_control(resource)}
+    if modified is not None:
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+    return headers
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+def resource_for_path(path: str) -> str:
+    # /api/<resource>/...
+    parts = path.split("/")
+    return parts[2] if len(parts) > 2 else ""
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    resource: str,
+    row: dict,
+    fields: Optional[Tuple[str, ...]] = None
+) -> Optional[Response]:
+    """Return a 304 if the client's copy of row is current, otherwise set the validators on response."""
+    if not settings.HTTP_CONDITIONAL_ENABLED:
+        return None
+
+    etag = row_etag(row, fields)
+    modified = last_modified(row)
+    headers = validator_headers(resource, etag, modified)
+    if is_not_modified(request, etag, modified):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
+
+async def probe_not_modified(
+    request: Request,
+    table: str,
+    row_id: str,
+    fields: Optional[Tuple[str, ...]] = None
+) -> Optional[Response]:
+    """Answer a revalidation from an id, updated_at probe without fetching the full row.
+
+    Only conditional requests are probed, so plain reads still cost a
+    single query.
+    """
+    if not settings.HTTP_CONDITIONAL_ENABLED or not is_conditional(request):
+        return None
+
+    supabase = supabase_service.get_client()
+    rows = (await supabase_service.execute(
+        supabase.table(table).select("id, updated_at").eq("id", row_id)
+    )).data
+    if not rows:
+        return None
+
+    etag = row_etag(rows[0], fields)
+    modified = last_modified(rows[0])
+    if is_not_modified(request, etag, modified):
+        return Response(status_code=304, headers=validator_headers(table, etag, modified))
+    return None
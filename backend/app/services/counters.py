@@ -0,0 +1,254 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.supabase import supabase_service, APIError
+from app.services.cache import cache_service
+from app.services.memberships import membership_service
+import asyncio
+import glob
+import json
+import os
+
+# Columns apply_counter_deltas() in database_schema.sql is allowed to touch
+COUNTER_COLUMNS = {
+    ("groups", "members_count"),
+    ("events", "attendees_count"),
+    ("courses", "enrolled_count"),
+    ("content", "views"),
+    ("content", "likes"),
+    ("content", "shares"),
+}
+
+def is_rejected(error: Exception) -> bool:
+    # Data exceptions, integrity violations and RAISE EXCEPTION fail the same way on every retry
+    return isinstance(error, APIError) and str(error.code or "")[:2] in ("22", "23", "P0")
+
+def is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, owned by another user
+        return True
+    return True
+
+class CounterSpool:
+    """Append-only log of buffered deltas that have not been flushed yet.
+
+    Every buffered increment is appended before it is acknowledged, and the
+    file is rotated on each flush, so a crash loses at most what the OS had
+    not written out since the last fsync. Each process spools to its own
+    <path>.<pid>, so uvicorn workers never append to, rotate or replay one
+    another's file; on startup a worker also takes over the spools of
+    workers that are no longer running.
+    """
+
+    def __init__(self, path: str):
+        self.base = path
+        self.path = f"{path}.{os.getpid()}"
+        self.file = None
+
+    def read(self, path: str) -> Dict[Tuple[str, str, str], int]:
+        deltas: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        if not os.path.exists(path):
+            return deltas
+        with open(path) as f:
+            for line in f:
+                try:
+                    table, column, row_id, delta = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash
+                    continue
+                deltas[(table, column, row_id)] += delta
+        os.remove(path)
+        return deltas
+
+    def replay(self) -> Dict[Tuple[str, str, str], int]:
+        # A leftover .flushing file means a flush was interrupted; replaying
+        # it may count those deltas twice, which is preferable to dropping them
+        deltas: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        claimed = self.path + ".claimed"
+        for path in self.orphans():
+            try:
+                # Renaming is atomic, so only one starting worker gets each file
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+            for key, delta in self.read(claimed).items():
+                deltas[key] += delta
+        return deltas
+
+    def orphans(self) -> List[str]:
+        """Spool files of this PID's previous run and of processes that have exited.
+
+        The unsuffixed files are from versions that shared one spool.
+        """
+        paths = []
+        for path in [self.base, self.base + ".flushing", *sorted(glob.glob(glob.escape(self.base) + ".*"))]:
+            if path in paths or not os.path.exists(path):
+                continue
+            owner = path[len(self.base) + 1:].split(".")[0]
+            if owner.isdigit() and int(owner) != os.getpid() and is_running(int(owner)):
+                continue
+            paths.append(path)
+        return paths
+
+    def recover(self) -> Dict[Tuple[str, str, str], int]:
+        """Deltas of a flush that was interrupted before it finished."""
+        return self.read(self.path + ".flushing")
+
+    def append(self, key: Tuple[str, str, str], delta: int):
+        if self.file is None:
+            self.file = open(self.path, "a")
+        self.file.write(json.dumps([*key, delta]) + "\n")
+        self.file.flush()
+
+    def rotate(self) -> str:
+        """Move the current spool aside so new deltas go to a fresh file."""
+        if self.file is not None:
+            os.fsync(self.file.fileno())
+            self.file.close()
+            self.file = None
+        flushing = self.path + ".flushing"
+        if os.path.exists(self.path):
+            os.replace(self.path, flushing)
+        return flushing
+
+    def discard(self, path: str):
+        if os.path.exists(path):
+            os.remove(path)
+
+class CounterService:
+    """Applies counter deltas atomically in the database.
+
+    Buffered counters are coalesced in memory per (table, column, id) and
+    written as one batch every COUNTER_FLUSH_INTERVAL seconds, so a burst of
+    joins on a popular group costs one UPDATE instead of one per join.
+    """
+
+    def __init__(self):
+        self.pending: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self.task: Optional[asyncio.Task] = None
+        self.spool = CounterSpool(settings.COUNTER_SPOOL_PATH) if settings.COUNTER_SPOOL_PATH else None
+        # One flush at a time, so stop() waits for a running one to finish
+        self.lock = asyncio.Lock()
+        self.flushes = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    def is_buffered(self, table: str, column: str) -> bool:
+        return f"{table}.{column}" in settings.COUNTER_BUFFERED_COLUMNS
+
+    async def increment(self, table: str, row_id: str, column: str, delta: int = 1):
+        if (table, column) not in COUNTER_COLUMNS:
+            raise ValueError(f"Unknown counter {table}.{column}")
+
+        if self.is_buffered(table, column):
+            key = (table, column, row_id)
+            if self.spool is not None:
+                self.spool.append(key, delta)
+            if key in self.pending:
+                self.coalesced += 1
+            self.pending[key] += delta
+            return
+
+        await self.apply({(table, column, row_id): delta})
+
+    async def apply(self, deltas: Dict[Tuple[str, str, str], int]):
+        # Sorted so concurrent batches lock rows in the same order
+        batch = [
+            {"table": table, "column": column, "id": row_id, "delta": delta}
+            for (table, column, row_id), delta in sorted(deltas.items())
+            if delta != 0
+        ]
+        if not batch:
+            return
+
+        supabase = supabase_service.get_client()
+        await supabase_service.execute(supabase.rpc("apply_counter_deltas", {"p_deltas": batch}))
+
+        for table, _, row_id in deltas:
+            await cache_service.invalidate(table, row_id)
+            if table == "groups":
+                # "My groups" summaries hold members_count too
+                membership_service.invalidate_summary(row_id)
+
+    async def apply_each(self, deltas: Dict[Tuple[str, str, str], int]) -> Dict[Tuple[str, str, str], int]:
+        """Apply deltas one by one after their batch was rejected; returns those to retry."""
+        retry = {}
+        for key, delta in deltas.items():
+            try:
+                await self.apply({key: delta})
+            except Exception as e:
+                if not is_rejected(e):
+                    retry[key] = delta
+                    continue
+                # Retrying would fail every later batch too, so set it aside
+                print(f"Dropping counter delta {key} {delta:+d}: {e}")
+                self.rejected += 1
+        return retry
+
+    async def flush(self):
+        async with self.lock:
+            if self.spool is not None:
+                for key, delta in self.spool.recover().items():
+                    self.pending[key] += delta
+                    self.spool.append(key, delta)
+            if not self.pending:
+                return
+
+            deltas, self.pending = self.pending, defaultdict(int)
+            flushing = self.spool.rotate() if self.spool is not None else None
+            try:
+                await self.apply(deltas)
+            except Exception as e:
+                print(f"Counter flush failed: {e}")
+                failed = await self.apply_each(deltas) if is_rejected(e) else deltas
+                # Put the deltas back so the next flush retries them
+                for key, delta in failed.items():
+                    self.pending[key] += delta
+                    if self.spool is not None:
+                        self.spool.append(key, delta)
+            else:
+                self.flushes += 1
+
+            if flushing is not None:
+                self.spool.discard(flushing)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(settings.COUNTER_FLUSH_INTERVAL)
+            # Shielded: cancelling the loop must not abandon a batch mid-apply
+            await asyncio.shield(self.flush())
+
+    def start(self):
+        if self.spool is not None:
+            for key, delta in self.spool.replay().items():
+                self.pending[key] += delta
+                self.spool.append(key, delta)
+
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        # Waits for a flush the loop had in progress before flushing the rest
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self.pending),
+            "flushes": self.flushes,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected
+        }
+
+# Create a singleton instance
+counter_service = CounterService()
@@ -0,0 +1,191 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.supabase import supabase_service
+from app.services.pagination import paginate, encode_cursor
+import asyncio
+import heapq
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# The closest point of a lat/lng cell is only approximately the nearest on a
+# sphere, so cell lower bounds are shrunk slightly to stay conservative
+CELL_BOUND_SLACK = 0.99
+
+def parse_coords(coords) -> Optional[Tuple[float, float]]:
+    """Read (lat, lng) from a location_coords value.
+
+    Accepts {"lat", "lng"}, {"latitude", "longitude"} or a [lng, lat]
+    GeoJSON-style pair.
+    """
+    try:
+        if isinstance(coords, dict):
+            lat = coords.get("lat", coords.get("latitude"))
+            lng = coords.get("lng", coords.get("lon", coords.get("longitude")))
+        elif isinstance(coords, (list, tuple)) and len(coords) == 2:
+            lng, lat = coords
+        else:
+            return None
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+class GeoIndex:
+    """In-process grid index over event coordinates.
+
+    Events are bucketed into GEO_CELL_DEGREES x GEO_CELL_DEGREES cells. A
+    radius query visits the cells inside the circle nearest first and stops
+    once no remaining cell can beat the current top results, so its cost
+    depends on local density rather than on the total number of events.
+    """
+
+    def __init__(self, cell_degrees: Optional[float] = None):
+        self.cell_degrees = cell_degrees or settings.GEO_CELL_DEGREES
+        self.lng_cells = math.ceil(360 / self.cell_degrees)
+        self.cells: Dict[Tuple[int, int], Dict[str, Tuple[float, float]]] = defaultdict(dict)
+        self.locations: Dict[str, Tuple[int, int]] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.ready = False
+
+    def cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (
+            math.floor(lat / self.cell_degrees),
+            math.floor((lng + 180) / self.cell_degrees) % self.lng_cells
+        )
+
+    def add(self, row: dict):
+        event_id = str(row["id"])
+        self.remove(event_id)
+
+        coords = parse_coords(row.get("location_coords"))
+        if coords is None:
+            return
+
+        cell = self.cell(*coords)
+        self.cells[cell][event_id] = coords
+        self.locations[event_id] = cell
+
+    def remove(self, event_id: str):
+        cell = self.locations.pop(str(event_id), None)
+        if cell is None:
+            return
+
+        bucket = self.cells[cell]
+        bucket.pop(str(event_id), None)
+        if not bucket:
+            del self.cells[cell]
+
+    def cells_in_box(self, min_row: int, max_row: int, min_col: int, max_col: int):
+        """Yield populated (row, unwrapped col) cells inside a cell box."""
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self.cells):
+            # Large radius over a sparse index: scanning populated cells is cheaper
+            for row, col in self.cells:
+                col = min_col + (col - min_col) % self.lng_cells
+                if min_row <= row <= max_row and col <= max_col:
+                    yield row, col
+            return
+
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                if (row, col % self.lng_cells) in self.cells:
+                    yield row, col
+
+    def nearby(self, lat: float, lng: float, radius_km: float, limit: int = 20) -> List[Tuple[str, float]]:
+        """Return up to limit (event id, distance km) pairs, nearest first."""
+        lat_span = radius_km / KM_PER_DEGREE
+        # Longitude degrees shrink towards the poles; clamp to avoid blowing up
+        cos_lat = max(math.cos(math.radians(min(89.9, abs(lat) + lat_span))), 1e-6)
+        lng_span = min(180.0, radius_km / (KM_PER_DEGREE * cos_lat))
+
+        size = self.cell_degrees
+        min_row = math.floor(max(-90.0, lat - lat_span) / size)
+        max_row = math.floor(min(90.0, lat + lat_span) / size)
+        # Columns are left unwrapped here so cell bounds stay comparable to lng
+        min_col = math.floor((lng - lng_span + 180) / size)
+        max_col = min(min_col + self.lng_cells - 1, math.floor((lng + lng_span + 180) / size))
+
+        # Visit cells nearest first, using the distance to the closest point
+        # of each cell as a lower bound for every event inside it
+        candidates = []
+        for row, col in self.cells_in_box(min_row, max_row, min_col, max_col):
+            nearest_lat = min(max(lat, row * size), (row + 1) * size)
+            nearest_lng = min(max(lng, col * size - 180), (col + 1) * size - 180)
+            bound = haversine_km(lat, lng, nearest_lat, nearest_lng) * CELL_BOUND_SLACK
+            if bound <= radius_km:
+                candidates.append((bound, (row, col % self.lng_cells)))
+        candidates.sort()
+
+        lat_rad = math.radians(lat)
+        cos_origin = math.cos(lat_rad)
+        radians, sin, cos, asin, sqrt = math.radians, math.sin, math.cos, math.asin, math.sqrt
+        diameter = 2 * EARTH_RADIUS_KM
+
+        # Max-heap of the best matches so far, as (-distance, event id)
+        best: List[Tuple[float, str]] = []
+        for bound, key in candidates:
+            if len(best) == limit and bound > -best[0][0]:
+                break
+            for event_id, (event_lat, event_lng) in self.cells[key].items():
+                event_lat_rad = radians(event_lat)
+                a = sin((event_lat_rad - lat_rad) / 2) ** 2 + \
+                    cos_origin * cos(event_lat_rad) * sin(radians(event_lng - lng) / 2) ** 2
+                distance = diameter * asin(min(1.0, sqrt(a)))
+                if distance > radius_km:
+                    continue
+                if len(best) < limit:
+                    heapq.heappush(best, (-distance, event_id))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, event_id))
+
+        return [(event_id, -distance) for distance, event_id in sorted(best, reverse=True)]
+
+    async def bootstrap(self):
+        supabase = supabase_service.get_client()
+        batch = settings.GEO_BOOTSTRAP_BATCH
+
+        cursor = None
+        while True:
+            query = paginate(supabase.table("events").select("id, location_coords, created_at"), "created_at", batch, cursor=cursor)
+            rows = (await supabase_service.execute(query)).data
+            for row in rows:
+                self.add(row)
+            if len(rows) < batch:
+                break
+            cursor = encode_cursor(rows[-1], "created_at")
+
+        self.ready = True
+
+    async def run(self):
+        try:
+            await self.bootstrap()
+        except Exception as e:
+            print(f"Geo index bootstrap failed: {e}")
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "events": len(self.locations),
+            "cells": len(self.cells)
+        }
+
+# Create a singleton instance
+geo_index = GeoIndex()
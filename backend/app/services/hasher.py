@@ -0,0 +1,94 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from app.core.config import settings
+from app.core import security
+import asyncio
+import multiprocessing
+import os
+import time
+
+class PasswordHasher:
+    """Runs bcrypt in a process pool so hashing never blocks the event loop.
+
+    bcrypt is deliberately CPU-heavy (100-300ms per call), so a login burst
+    on the event loop would stall every other request on the worker. At
+    most HASHER_MAX_PENDING calls may be queued or running; beyond that
+    callers get a 429 instead of waiting behind an ever-growing queue.
+    """
+
+    def __init__(self):
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.workers = settings.HASHER_WORKERS or os.cpu_count() or 1
+        self.in_flight = 0
+        self.hashes = 0
+        self.verifies = 0
+        self.rehashes = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+
+    def start(self):
+        if self.executor is None:
+            # spawn rather than fork: the parent already runs executor threads
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def stop(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def run(self, function, *args):
+        if self.in_flight >= settings.HASHER_MAX_PENDING:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too many authentication requests, please retry shortly",
+                headers={"Retry-After": str(settings.HASHER_RETRY_AFTER)}
+            )
+
+        self.start()
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); replace the pool for later calls
+            self.stop()
+            raise
+        finally:
+            self.in_flight -= 1
+            self.busy_seconds += time.perf_counter() - start
+
+    async def hash(self, password: str) -> str:
+        hashed = await self.run(security.get_password_hash, password)
+        self.hashes += 1
+        return hashed
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Return (valid, new hash or None if the stored cost is current)."""
+        valid, new_hash = await self.run(security.verify_and_update_password, password, hashed_password)
+        self.verifies += 1
+        if new_hash is not None:
+            self.rehashes += 1
+        return valid, new_hash
+
+    def stats(self) -> dict:
+        completed = self.hashes + self.verifies
+        return {
+            "workers": self.workers,
+            "rounds": settings.BCRYPT_ROUNDS,
+            "in_flight": self.in_flight,
+            "max_pending": settings.HASHER_MAX_PENDING,
+            "hashes": self.hashes,
+            "verifies": self.verifies,
+            "rehashes": self.rehashes,
+            "rejected": self.rejected,
+            "avg_ms": round(self.busy_seconds / completed * 1000, 2) if completed else 0.0
+        }
+
+# Create a singleton instance
+password_hasher = PasswordHasher()
@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+from app.core.config import settings
+from app.services.supabase import supabase_service
+import time
+
+def today() -> date:
+    return datetime.now(timezone.utc).date()
+
+def parse_day(value: Optional[str]) -> date:
+    try:
+        return date.fromisoformat(value[:10])
+    except (TypeError, ValueError):
+        return today()
+
+class HeatmapService:
+    """Daily activity levels, rolled up as activity happens.
+
+    Each activity is folded into its (user, day) row of heatmap_data by the
+    record_activity() SQL function, so reads never scan checkins, bookings
+    or course progress. Reads are served from an LRU of per-user bytearrays
+    holding one level per day of the HEATMAP_DAYS window, oldest first.
+    """
+
+    def __init__(self):
+        # user_id -> (last day of the window, levels, expires_at)
+        self.windows: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def cache(self, user_id: str, end: date, levels: bytearray):
+        self.windows[user_id] = (end, levels, time.monotonic() + settings.HEATMAP_CACHE_TTL)
+        self.windows.move_to_end(user_id)
+        while len(self.windows) > settings.HEATMAP_CACHE_MAX_USERS:
+            self.windows.popitem(last=False)
+
+    def cached(self, user_id: str, end: date) -> Optional[bytearray]:
+        entry = self.windows.get(user_id)
+        if entry is None:
+            return None
+
+        cached_end, levels, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self.windows[user_id]
+            return None
+
+        # Slide the window forward to today; new days start at level 0
+        shift = (end - cached_end).days
+        if shift < 0:
+            return None
+        if shift:
+            levels = levels[shift:] + bytearray(min(shift, len(levels)))
+            self.windows[user_id] = (end, levels, expires_at)
+
+        self.windows.move_to_end(user_id)
+        return levels
+
+    async def load(self, user_id: str, end: date) -> bytearray:
+        days = settings.HEATMAP_DAYS
+        start = end - timedelta(days=days - 1)
+
+        supabase = supabase_service.get_client()
+        rows = (await supabase_service.execute(
+            supabase.table("heatmap_data").select("date, level").eq("user_id", user_id)
+            .gte("date", start.isoformat()).lte("date", end.isoformat())
+        )).data
+
+        levels = bytearray(days)
+        for row in rows:
+            levels[(date.fromisoformat(row["date"]) - start).days] = row["level"] or 0
+        return levels
+
+    async def get(self, user_id: str) -> List[int]:
+        end = today()
+        levels = self.cached(user_id, end)
+        if levels is None:
+            self.misses += 1
+            levels = await self.load(user_id, end)
+            self.cache(user_id, end, levels)
+        else:
+            self.hits += 1
+        return list(levels)
+
+    def update_cached(self, user_id: str, day: date, level: int):
+        levels = self.cached(user_id, today())
+        if levels is None:
+            return
+        index = settings.HEATMAP_DAYS - 1 - (today() - day).days
+        if 0 <= index < len(levels):
+            levels[index] = level
+
+    async def record(self, user_id: str, activity: str, day: Optional[date] = None, count: int = 1):
+        """Fold count activities into the user's rollup row for day (today by default)."""
+        day = day or today()
+        supabase = supabase_service.get_client()
+        try:
+            level = (await supabase_service.execute(supabase.rpc("record_activity", {
+                "p_user_id": user_id,
+                "p_date": day.isoformat(),
+                "p_activity": activity,
+                "p_thresholds": settings.HEATMAP_LEVEL_THRESHOLDS,
+                "p_count": count
+            }))).data
+        except Exception as e:
+            # The rollup is derived data; never fail the write that triggered it
+            print(f"Heatmap rollup failed: {e}")
+            self.windows.pop(user_id, None)
+            return
+
+        if isinstance(level, int):
+            self.update_cached(user_id, day, level)
+        else:
+            self.windows.pop(user_id, None)
+
+    async def set_levels(self, user_id: str, levels: List[int]):
+        """Store explicit levels for the window ending today, oldest first."""
+        end = today()
+        levels = levels[-settings.HEATMAP_DAYS:]
+        start = end - timedelta(days=len(levels) - 1)
+
+        supabase = supabase_service.get_client()
+        await supabase_service.execute(supabase.table("heatmap_data").upsert([
+            {"user_id": user_id, "date": (start + timedelta(days=i)).isoformat(), "level": level}
+            for i, level in enumerate(levels)
+        ], on_conflict="user_id,date"))
+
+        self.windows.pop(user_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self.windows),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+# Create a singleton instance
+heatmap_service = HeatmapService()
@@ -0,0 +1,164 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.services.supabase import supabase_service, is_uuid
+import time
+import uuid
+
+# Columns GroupResponse needs; the shared summaries hold nothing else
+SUMMARY_COLUMNS = "id, name, description, cover, icon, members_count, created_at, updated_at"
+
+def pack(group_ids: List[str]) -> bytes:
+    return b"".join(uuid.UUID(group_id).bytes for group_id in group_ids)
+
+def unpack(packed: bytes, offset: int = 0, limit: Optional[int] = None) -> List[str]:
+    end = len(packed) if limit is None else min(len(packed), (offset + limit) * 16)
+    return [str(uuid.UUID(bytes=packed[i:i + 16])) for i in range(offset * 16, end, 16)]
+
+class MembershipService:
+    """Materialized "my groups" lists, served without joining group_members and groups.
+
+    Each user's memberships are cached as their group ids packed 16 bytes
+    per UUID, most recently joined first, so a user in thousands of groups
+    costs tens of kilobytes. Group rows come from a shared LRU of summaries
+    (just the GroupResponse columns), so a popular group is held once
+    however many users list it. add_group_member and remove_group_member
+    keep both up to date, and a counter flush drops the summaries whose
+    members_count it changed; other workers catch up within the TTLs.
+    """
+
+    def __init__(self):
+        # user_id -> (packed group ids, expires_at)
+        self.lists: OrderedDict = OrderedDict()
+        # group_id -> (summary row, expires_at)
+        self.summaries: OrderedDict = OrderedDict()
+        # Bumped on every membership change; a list loaded across a change is not cached
+        self.changes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def cached_list(self, user_id: str) -> Optional[bytes]:
+        entry = self.lists.get(user_id)
+        if entry is None:
+            return None
+
+        packed, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self.lists[user_id]
+            return None
+
+        self.lists.move_to_end(user_id)
+        return packed
+
+    def cache_list(self, user_id: str, packed: bytes):
+        self.lists[user_id] = (packed, time.monotonic() + settings.MEMBERSHIP_CACHE_TTL)
+        self.lists.move_to_end(user_id)
+        while len(self.lists) > settings.MEMBERSHIP_CACHE_MAX_USERS:
+            self.lists.popitem(last=False)
+
+    def cache_summary(self, group: dict):
+        self.summaries[group["id"]] = (group, time.monotonic() + settings.GROUP_SUMMARY_CACHE_TTL)
+        self.summaries.move_to_end(group["id"])
+        while len(self.summaries) > settings.GROUP_SUMMARY_CACHE_MAX_ENTRIES:
+            self.summaries.popitem(last=False)
+
+    async def group_ids(self, user_id: str) -> bytes:
+        # Tokens from the mock login carry ids like test-user-id, which the
+        # user_id UUID column would reject with 22P02; they have no groups
+        if not is_uuid(user_id):
+            return b""
+
+        packed = self.cached_list(user_id)
+        if packed is not None:
+            self.hits += 1
+            return packed
+
+        self.misses += 1
+        changes = self.changes
+        supabase = supabase_service.get_client()
+        rows = (await supabase_service.execute(
+            supabase.table("group_members").select("group_id").eq("user_id", user_id).order("joined_at", desc=True)
+        )).data
+
+        packed = pack([row["group_id"] for row in rows])
+        if changes == self.changes:
+            self.cache_list(user_id, packed)
+        return packed
+
+    async def load_summaries(self, group_ids: List[str]) -> Dict[str, dict]:
+        now = time.monotonic()
+        found = {}
+        missing = []
+        for group_id in group_ids:
+            entry = self.summaries.get(group_id)
+            if entry is not None and entry[1] > now:
+                self.summaries.move_to_end(group_id)
+                found[group_id] = entry[0]
+            else:
+                missing.append(group_id)
+
+        if missing:
+            supabase = supabase_service.get_client()
+            # Chunked to keep the in.() filter within URL length limits
+            for start in range(0, len(missing), settings.GROUP_SUMMARY_BATCH_SIZE):
+                rows = (await supabase_service.execute(
+                    supabase.table("groups").select(SUMMARY_COLUMNS).in_("id", missing[start:start + settings.GROUP_SUMMARY_BATCH_SIZE])
+                )).data
+                for row in rows:
+                    self.cache_summary(row)
+                    found[row["id"]] = row
+        return found
+
+    async def get(self, user_id: str, limit: int, offset: int = 0) -> List[dict]:
+        group_ids = unpack(await self.group_ids(user_id), offset, limit)
+        summaries = await self.load_summaries(group_ids)
+        # Groups deleted since the list was cached are skipped
+        return [summaries[group_id] for group_id in group_ids if group_id in summaries]
+
+    def add(self, user_id: str, group_id: str):
+        self.changes += 1
+        packed = self.cached_list(user_id)
+        if packed is not None:
+            self.cache_list(user_id, pack([group_id]) + packed)
+        self.adjust_members_count(group_id, 1)
+
+    def remove(self, user_id: str, group_id: str):
+        self.changes += 1
+        packed = self.cached_list(user_id)
+        if packed is not None:
+            member = uuid.UUID(group_id).bytes
+            self.cache_list(user_id, b"".join(
+                packed[i:i + 16] for i in range(0, len(packed), 16) if packed[i:i + 16] != member
+            ))
+        self.adjust_members_count(group_id, -1)
+
+    def adjust_members_count(self, group_id: str, delta: int):
+        entry = self.summaries.get(group_id)
+        if entry is not None:
+            group = entry[0]
+            # Replaced rather than mutated, responses may still hold the old row
+            self.summaries[group_id] = ({**group, "members_count": (group["members_count"] or 0) + delta}, entry[1])
+
+    def update_group(self, group: dict):
+        if group["id"] in self.summaries:
+            self.cache_summary({column: group.get(column) for column in SUMMARY_COLUMNS.split(", ")})
+
+    def remove_group(self, group_id: str):
+        self.summaries.pop(group_id, None)
+
+    def invalidate_summary(self, group_id: str):
+        # Reloaded on next use, after a counter flush changed members_count in the database
+        self.summaries.pop(group_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self.lists),
+            "group_ids": sum(len(packed) // 16 for packed, _ in self.lists.values()),
+            "list_bytes": sum(len(packed) for packed, _ in self.lists.values()),
+            "summaries": len(self.summaries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+# Create a singleton instance
+membership_service = MembershipService()
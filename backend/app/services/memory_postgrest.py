@@ -0,0 +1,765 @@
+from collections import defaultdict
+from copy import deepcopy
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from postgrest.exceptions import APIError
+import functools
+import re
+import threading
+import time
+import uuid
+
+SCHEMA_PATH = Path(__file__).resolve().parents[2] / "database_schema.sql"
+
+# PostgreSQL / PostgREST error codes raised like the real server would
+NOT_NULL_VIOLATION = "23502"
+FOREIGN_KEY_VIOLATION = "23503"
+UNIQUE_VIOLATION = "23505"
+INVALID_TEXT_REPRESENTATION = "22P02"
+INVALID_DATETIME_FORMAT = "22007"
+UNDEFINED_COLUMN = "42703"
+UNDEFINED_TABLE = "42P01"
+UNKNOWN_COLUMN = "PGRST204"
+UNKNOWN_FUNCTION = "PGRST202"
+PARSE_ERROR = "PGRST100"
+
+def api_error(code: str, message: str, details: Optional[str] = None) -> APIError:
+    return APIError({"code": code, "message": message, "details": details, "hint": None})
+
+def recorded(method: Callable) -> Callable:
+    """Keep a builder call in MemoryQuery.terms, like postgrest-py keeps it in the query string."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.terms.append((method.__name__, args, kwargs))
+        return method(self, *args, **kwargs)
+    return wrapper
+
+def now() -> str:
+    return canonical_timestamp(datetime.now(timezone.utc))
+
+def canonical_timestamp(value: Any) -> str:
+    # Fixed-width UTC ISO strings sort lexicographically in time order,
+    # so range filters and ordering never need to parse them
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value))
+        except ValueError:
+            raise api_error(INVALID_DATETIME_FORMAT, f'invalid input syntax for type timestamp with time zone: "{value}"')
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+class Column:
+    def __init__(self, name: str, type: str, not_null: bool = False, default: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.type = type
+        self.not_null = not_null
+        self.default = default
+
+    def convert(self, value: Any) -> Any:
+        """Coerce a written value or filter operand to the column's stored representation."""
+        if value is None:
+            return None
+        try:
+            if self.type == "integer":
+                return int(value)
+            if self.type == "numeric":
+                return float(value)
+            if self.type == "boolean":
+                if isinstance(value, str):
+                    return value.lower() in ("true", "t", "1")
+                return bool(value)
+            if self.type == "uuid":
+                return str(uuid.UUID(str(value)))
+            if self.type == "date":
+                return date.fromisoformat(str(value)[:10]).isoformat()
+        except ValueError:
+            raise api_error(INVALID_TEXT_REPRESENTATION, f'invalid input syntax for type {self.type}: "{value}"')
+        if self.type == "timestamptz":
+            return canonical_timestamp(value)
+        if self.type == "text":
+            return value if isinstance(value, str) else str(value)
+        # jsonb and arrays are stored as given, but never aliased with the caller
+        return deepcopy(value)
+
+class TableSchema:
+    def __init__(self, name: str):
+        self.name = name
+        self.columns: Dict[str, Column] = {}
+        self.primary_key = "id"
+        self.unique: List[Tuple[str, ...]] = []
+        # column -> (referenced table, referenced column, ON DELETE CASCADE)
+        self.foreign_keys: Dict[str, Tuple[str, str, bool]] = {}
+        self.indexed: List[str] = []
+        self.touch_updated_at = False
+
+COLUMN_TYPES = [
+    ("TIMESTAMP WITH TIME ZONE", "timestamptz"),
+    ("TIMESTAMP", "timestamptz"),
+    ("UUID", "uuid"),
+    ("INTEGER", "integer"),
+    ("DECIMAL", "numeric"),
+    ("FLOAT", "numeric"),
+    ("BOOLEAN", "boolean"),
+    ("DATE", "date"),
+    ("JSONB", "jsonb"),
+    ("TEXT[]", "array"),
+    ("TEXT", "text"),
+]
+
+def parse_default(expression: str) -> Callable[[], Any]:
+    if expression == "gen_random_uuid()":
+        return lambda: str(uuid.uuid4())
+    if expression == "NOW()":
+        return now
+    if expression in ("TRUE", "FALSE"):
+        return lambda: expression == "TRUE"
+    if expression.startswith("'"):
+        return lambda: expression.strip("'")
+    number = float(expression) if "." in expression else int(expression)
+    return lambda: number
+
+def parse_schema(sql: str) -> Dict[str, TableSchema]:
+    """Tables, constraints, indexes and updated_at triggers from database_schema.sql."""
+    tables = {}
+    for name, body in re.findall(r"CREATE TABLE (\w+) \((.*?)\n\);", sql, re.S):
+        table = tables[name] = TableSchema(name)
+        for line in body.splitlines():
+            line = line.split("--")[0].strip().rstrip(",")
+            if not line:
+                continue
+
+            constraint = re.match(r"UNIQUE\s*\(([^)]*)\)", line)
+            if constraint:
+                table.unique.append(tuple(column.strip() for column in constraint.group(1).split(",")))
+                continue
+
+            column_name, definition = line.split(None, 1)
+            column_type = next(kind for prefix, kind in COLUMN_TYPES if definition.startswith(prefix))
+            default = re.search(r"DEFAULT ('[^']*'|\S+\(\)|\S+)", definition)
+            table.columns[column_name] = Column(
+                column_name,
+                column_type,
+                not_null="NOT NULL" in definition or "PRIMARY KEY" in definition,
+                default=parse_default(default.group(1)) if default else None
+            )
+            if "PRIMARY KEY" in definition:
+                table.primary_key = column_name
+            if re.search(r"\bUNIQUE\b", definition):
+                table.unique.append((column_name,))
+            reference = re.search(r"REFERENCES (\w+)\((\w+)\)", definition)
+            if reference:
+                table.foreign_keys[column_name] = (reference.group(1), reference.group(2), False)
+
+    for name, column, referenced, referenced_column in re.findall(
+        r"ALTER TABLE (\w+) ADD CONSTRAINT \w+ FOREIGN KEY \((\w+)\) REFERENCES (\w+)\((\w+)\) ON DELETE CASCADE", sql
+    ):
+        tables[name].foreign_keys[column] = (referenced, referenced_column, True)
+
+    for name, column in re.findall(r"CREATE INDEX \w+ ON (\w+)\((\w+)\);", sql):
+        tables[name].indexed.append(column)
+
+    for name in re.findall(r"BEFORE UPDATE ON (\w+)\s+FOR EACH ROW\s+EXECUTE PROCEDURE update_timestamp\(\)", sql):
+        tables[name].touch_updated_at = "updated_at" in tables[name].columns
+
+    return tables
+
+class MemoryTable:
+    """Rows of one table keyed by primary key, with hash indexes.
+
+    Every single-column UNIQUE, REFERENCES and CREATE INDEX column gets a
+    value -> primary keys index used to narrow eq / in filters, and every
+    UNIQUE constraint a value tuple -> primary key index used to enforce it.
+    """
+
+    def __init__(self, schema: TableSchema):
+        self.schema = schema
+        self.rows: Dict[Any, dict] = {}
+        self.unique: Dict[Tuple[str, ...], Dict[tuple, Any]] = {columns: {} for columns in schema.unique}
+        indexed = {*schema.indexed, *schema.foreign_keys, *(columns[0] for columns in schema.unique if len(columns) == 1)}
+        indexed.discard(schema.primary_key)
+        self.indexes: Dict[str, Dict[Any, set]] = {column: defaultdict(set) for column in indexed}
+
+    def lookup(self, column: str, value: Any) -> Optional[set]:
+        """Primary keys with column == value, or None if column is not indexed."""
+        if column == self.schema.primary_key:
+            return {value} if value in self.rows else set()
+        index = self.indexes.get(column)
+        if index is None:
+            return None
+        return index.get(value, set())
+
+    def conflict(self, row: dict, ignore: Any = None) -> Optional[Tuple[str, ...]]:
+        for columns, index in self.unique.items():
+            key = tuple(row.get(column) for column in columns)
+            # NULLs never conflict in a UNIQUE constraint
+            if None not in key and index.get(key, ignore) != ignore:
+                return columns
+        return None
+
+    def add(self, row: dict):
+        pk = row[self.schema.primary_key]
+        self.rows[pk] = row
+        for columns, index in self.unique.items():
+            key = tuple(row.get(column) for column in columns)
+            if None not in key:
+                index[key] = pk
+        for column, index in self.indexes.items():
+            index[row.get(column)].add(pk)
+
+    def discard(self, row: dict):
+        pk = row[self.schema.primary_key]
+        del self.rows[pk]
+        for columns, index in self.unique.items():
+            key = tuple(row.get(column) for column in columns)
+            if index.get(key) == pk:
+                del index[key]
+        for column, index in self.indexes.items():
+            bucket = index.get(row.get(column))
+            if bucket is not None:
+                bucket.discard(pk)
+                if not bucket:
+                    del index[row.get(column)]
+
+def split_top_level(text: str) -> List[str]:
+    """Split a PostgREST logic tree on commas outside parentheses and quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    escaped = False
+    for char in text:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+def unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+COMPARISONS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+Predicate = Callable[[dict], bool]
+
+class MemoryQuery:
+    """A PostgREST request against a MemoryDatabase, built like the supabase-py builders."""
+
+    def __init__(self, database: "MemoryDatabase", table_name: str, operation: str = "select", params: Any = None):
+        self.database = database
+        self.table_name = table_name
+        self.operation = operation
+        self.params = params
+        self.columns = "*"
+        self.count_mode = None
+        self.filters: List[Predicate] = []
+        # (column, value) pairs from top-level eq filters, used to pick an index
+        self.equalities: List[Tuple[str, Any]] = []
+        self.memberships: List[Tuple[str, list]] = []
+        self.orders: List[Tuple[str, bool, Optional[bool]]] = []
+        self.limit_count: Optional[int] = None
+        self.offset_count = 0
+        self.payload: Any = None
+        self.on_conflict: Optional[str] = None
+        self.ignore_duplicates = False
+        # Filter and modifier calls in order; with the columns they identify a read
+        self.terms: List[Tuple[str, tuple, dict]] = []
+
+    @property
+    def schema(self) -> TableSchema:
+        return self.database.schema(self.table_name)
+
+    def column(self, name: str) -> Column:
+        column = self.schema.columns.get(name)
+        if column is None:
+            raise api_error(UNDEFINED_COLUMN, f"column {self.table_name}.{name} does not exist")
+        return column
+
+    # Operations
+
+    def select(self, *columns: str, count: Optional[str] = None, head: Optional[bool] = None):
+        self.columns = ",".join(columns) or "*"
+        self.count_mode = count
+        return self
+
+    def insert(self, json: Any, count: Optional[str] = None, returning: Any = None, upsert: bool = False, **kwargs):
+        self.operation = "upsert" if upsert else "insert"
+        self.payload = json
+        return self
+
+    def upsert(self, json: Any, count: Optional[str] = None, returning: Any = None,
+               ignore_duplicates: bool = False, on_conflict: str = "", **kwargs):
+        self.operation = "upsert"
+        self.payload = json
+        self.on_conflict = on_conflict or None
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, json: dict, count: Optional[str] = None, returning: Any = None, **kwargs):
+        self.operation = "update"
+        self.payload = json
+        return self
+
+    def delete(self, count: Optional[str] = None, returning: Any = None):
+        self.operation = "delete"
+        return self
+
+    # Filters
+
+    def compare(self, column: str, operator: str, value: Any) -> Predicate:
+        operand = self.column(column).convert(value)
+        compare = COMPARISONS[operator]
+        # SQL comparisons with NULL are never true
+        return lambda row: (current := row.get(column)) is not None and operand is not None and compare(current, operand)
+
+    def condition(self, column: str, operator: str, value: Any) -> Predicate:
+        if operator in COMPARISONS:
+            return self.compare(column, operator, value)
+        if operator == "is":
+            target = {"null": None, "true": True, "false": False}.get(str(value).lower(), value)
+            self.column(column)
+            return lambda row: row.get(column) is target
+        if operator == "in":
+            if isinstance(value, str):
+                value = [unquote(item) for item in split_top_level(value.strip("()"))]
+            members = {self.column(column).convert(item) for item in value}
+            return lambda row: row.get(column) in members
+        if operator in ("like", "ilike"):
+            flags = re.I if operator == "ilike" else 0
+            pattern = re.compile(re.escape(str(value)).replace("%", ".*").replace("\\*", ".*").replace("_", "."), flags)
+            self.column(column)
+            return lambda row: row.get(column) is not None and pattern.fullmatch(str(row[column])) is not None
+        raise api_error(PARSE_ERROR, f'"failed to parse filter ({operator}.{value})"')
+
+    def logic(self, expression: str) -> Predicate:
+        """Predicate for one PostgREST logic tree term, e.g. and(views.eq.3,id.lt."x")."""
+        for kind in ("and", "or"):
+            if expression.startswith(kind + "(") and expression.endswith(")"):
+                terms = [self.logic(term) for term in split_top_level(expression[len(kind) + 1:-1])]
+                if kind == "and":
+                    return lambda row: all(term(row) for term in terms)
+                return lambda row: any(term(row) for term in terms)
+
+        column, _, rest = expression.partition(".")
+        negate = rest.startswith("not.")
+        if negate:
+            rest = rest[4:]
+        operator, _, value = rest.partition(".")
+        predicate = self.condition(column, operator, unquote(value))
+        if negate:
+            return lambda row: not predicate(row)
+        return predicate
+
+    @recorded
+    def eq(self, column: str, value: Any):
+        self.equalities.append((column, self.column(column).convert(value)))
+        self.filters.append(self.compare(column, "eq", value))
+        return self
+
+    @recorded
+    def neq(self, column: str, value: Any):
+        self.filters.append(self.compare(column, "neq", value))
+        return self
+
+    @recorded
+    def gt(self, column: str, value: Any):
+        self.filters.append(self.compare(column, "gt", value))
+        return self
+
+    @recorded
+    def gte(self, column: str, value: Any):
+        self.filters.append(self.compare(column, "gte", value))
+        return self
+
+    @recorded
+    def lt(self, column: str, value: Any):
+        self.filters.append(self.compare(column, "lt", value))
+        return self
+
+    @recorded
+    def lte(self, column: str, value: Any):
+        self.filters.append(self.compare(column, "lte", value))
+        return self
+
+    @recorded
+    def like(self, column: str, pattern: str):
+        self.filters.append(self.condition(column, "like", pattern))
+        return self
+
+    @recorded
+    def ilike(self, column: str, pattern: str):
+        self.filters.append(self.condition(column, "ilike", pattern))
+        return self
+
+    @recorded
+    def is_(self, column: str, value: Any):
+        self.filters.append(self.condition(column, "is", "null" if value is None else value))
+        return self
+
+    @recorded
+    def in_(self, column: str, values: list):
+        values = list(values)
+        self.memberships.append((column, [self.column(column).convert(value) for value in values]))
+        self.filters.append(self.condition(column, "in", values))
+        return self
+
+    def match(self, query: dict):
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    @recorded
+    def or_(self, filters: str, reference_table: Optional[str] = None):
+        terms = [self.logic(term) for term in split_top_level(filters)]
+        self.filters.append(lambda row: any(term(row) for term in terms))
+        return self
+
+    # Modifiers
+
+    @recorded
+    def order(self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None, foreign_table: Optional[str] = None):
+        self.column(column)
+        self.orders.append((column, desc, nullsfirst))
+        return self
+
+    @recorded
+    def limit(self, size: int, *, foreign_table: Optional[str] = None):
+        self.limit_count = size
+        return self
+
+    @recorded
+    def offset(self, size: int):
+        self.offset_count = size
+        return self
+
+    @recorded
+    def range(self, start: int, end: int, foreign_table: Optional[str] = None):
+        self.offset_count = start
+        self.limit_count = end - start + 1
+        return self
+
+    def execute(self) -> "MemoryResponse":
+        return self.database.execute(self)
+
+class MemoryResponse:
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+class MemoryDatabase:
+    """In-process PostgREST-compatible store for offline and load testing.
+
+    Tables, defaults, NOT NULL, UNIQUE and foreign key constraints (with
+    ON DELETE CASCADE) and updated_at triggers come from
+    database_schema.sql. The SQL functions the app calls through rpc() are
+    reimplemented in Python. Constraint violations raise the same
+    postgrest APIError codes as the real server. Each request runs under a
+    single lock, so concurrent requests from the query thread pool see
+    consistent data.
+    """
+
+    def __init__(self, schema_path: Path = SCHEMA_PATH, latency: float = 0.0):
+        self.schemas = parse_schema(schema_path.read_text(encoding="utf-8"))
+        self.tables = {name: MemoryTable(schema) for name, schema in self.schemas.items()}
+        # Child tables by referenced table: (child table, column, ON DELETE CASCADE)
+        self.references: Dict[str, List[Tuple[str, str, bool]]] = defaultdict(list)
+        for name, schema in self.schemas.items():
+            for column, (referenced, _, cascade) in schema.foreign_keys.items():
+                self.references[referenced].append((name, column, cascade))
+        self.functions: Dict[str, Callable[[dict], Any]] = {
+            "apply_counter_deltas": self.apply_counter_deltas,
+            "record_activity": self.record_activity,
+        }
+        # Simulated round trip per request, slept outside the lock
+        self.latency = latency
+        self.lock = threading.RLock()
+
+    def schema(self, table_name: str) -> TableSchema:
+        schema = self.schemas.get(table_name)
+        if schema is None:
+            raise api_error(UNDEFINED_TABLE, f'relation "public.{table_name}" does not exist')
+        return schema
+
+    def execute(self, query: MemoryQuery) -> MemoryResponse:
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            if query.operation == "rpc":
+                function = self.functions.get(query.table_name)
+                if function is None:
+                    raise api_error(UNKNOWN_FUNCTION, f"Could not find the function public.{query.table_name} in the schema cache")
+                return MemoryResponse(function(query.params or {}))
+
+            table = self.tables.get(query.table_name)
+            if table is None:
+                self.schema(query.table_name)
+            if query.operation in ("insert", "upsert"):
+                rows = query.payload if isinstance(query.payload, list) else [query.payload]
+                return self.project(query, self.write(table, rows, query))
+
+            matched = self.scan(table, query)
+            if query.operation == "update":
+                return self.project(query, [self.update(table, row, query.payload) for row in matched])
+            if query.operation == "delete":
+                for row in matched:
+                    self.delete(table, row)
+                return self.project(query, matched)
+
+            count = len(matched) if query.count_mode else None
+            matched = self.page(matched, query)
+            return MemoryResponse(self.project(query, matched).data, count)
+
+    # Reads
+
+    def scan(self, table: MemoryTable, query: MemoryQuery) -> List[dict]:
+        candidates = None
+        for column, value in query.equalities:
+            keys = table.lookup(column, value)
+            if keys is not None and (candidates is None or len(keys) < len(candidates)):
+                candidates = keys
+        for column, values in query.memberships:
+            buckets = [table.lookup(column, value) for value in values]
+            if all(bucket is not None for bucket in buckets):
+                keys = set().union(*buckets)
+                if candidates is None or len(keys) < len(candidates):
+                    candidates = keys
+
+        rows = table.rows.values() if candidates is None else [table.rows[key] for key in candidates if key in table.rows]
+        filters = query.filters
+        matched = [row for row in rows if all(predicate(row) for predicate in filters)]
+        if candidates is not None and not query.orders:
+            # Index buckets are unordered; keep insertion order like a heap scan would
+            position = {key: index for index, key in enumerate(table.rows)}
+            matched.sort(key=lambda row: position[row[table.schema.primary_key]])
+        return matched
+
+    def page(self, rows: List[dict], query: MemoryQuery) -> List[dict]:
+        # Stable sorts applied from the last key to the first give a multi-column order;
+        # PostgreSQL puts NULLs last ascending and first descending unless told otherwise
+        for column, desc, nullsfirst in reversed(query.orders):
+            nulls_first = desc if nullsfirst is None else nullsfirst
+            present = [row for row in rows if row.get(column) is not None]
+            missing = [row for row in rows if row.get(column) is None]
+            present.sort(key=lambda row: row[column], reverse=desc)
+            rows = missing + present if nulls_first else present + missing
+
+        end = None if query.limit_count is None else query.offset_count + query.limit_count
+        return rows[query.offset_count:end]
+
+    def project(self, query: MemoryQuery, rows: List[dict]) -> MemoryResponse:
+        columns = [column.strip() for column in query.columns.split(",") if column.strip()]
+        if "*" in columns:
+            columns = list(query.schema.columns)
+        else:
+            for column in columns:
+                if "(" in column or ":" in column:
+                    raise api_error(PARSE_ERROR, f"Embedded resources and renames are not supported: {column}")
+                query.column(column)
+
+        return MemoryResponse([
+            {column: deepcopy(value) if isinstance(value := row.get(column), (dict, list)) else value for column in columns}
+            for row in rows
+        ])
+
+    # Writes
+
+    def check(self, table: MemoryTable, row: dict, existing_key: Any = None):
+        schema = table.schema
+        for column in schema.columns.values():
+            if column.not_null and row.get(column.name) is None:
+                raise api_error(
+                    NOT_NULL_VIOLATION,
+                    f'null value in column "{column.name}" of relation "{schema.name}" violates not-null constraint'
+                )
+
+        conflict = table.conflict(row, existing_key)
+        if conflict is not None:
+            raise api_error(
+                UNIQUE_VIOLATION,
+                f'duplicate key value violates unique constraint "{schema.name}_{"_".join(conflict)}_key"',
+                f"Key ({', '.join(conflict)})=({', '.join(str(row[column]) for column in conflict)}) already exists."
+            )
+
+        for column, (referenced, referenced_column, _) in schema.foreign_keys.items():
+            value = row.get(column)
+            if value is None:
+                continue
+            keys = self.tables[referenced].lookup(referenced_column, value)
+            if not keys:
+                raise api_error(
+                    FOREIGN_KEY_VIOLATION,
+                    f'insert or update on table "{schema.name}" violates foreign key constraint "{schema.name}_{column}_fkey"',
+                    f'Key ({column})=({value}) is not present in table "{referenced}".'
+                )
+
+    def convert(self, table: MemoryTable, values: dict) -> dict:
+        converted = {}
+        for name, value in values.items():
+            column = table.schema.columns.get(name)
+            if column is None:
+                raise api_error(UNKNOWN_COLUMN, f"Could not find the '{name}' column of '{table.schema.name}' in the schema cache")
+            converted[name] = column.convert(value)
+        return converted
+
+    def write(self, table: MemoryTable, rows: List[dict], query: MemoryQuery) -> List[dict]:
+        # A multi-row request is one statement: all rows are written or none are
+        written, replaced = [], []
+        conflict_columns = tuple(
+            column.strip() for column in (query.on_conflict or table.schema.primary_key).split(",")
+        )
+        try:
+            for values in rows:
+                values = self.convert(table, values)
+                if query.operation == "upsert":
+                    existing = self.find(table, conflict_columns, values)
+                    if existing is not None:
+                        if not query.ignore_duplicates:
+                            replaced.append(dict(existing))
+                            written.append(self.update(table, existing, values, converted=True))
+                        continue
+
+                row = {}
+                for name, column in table.schema.columns.items():
+                    if name in values:
+                        row[name] = values[name]
+                    elif column.default is not None:
+                        row[name] = column.default()
+                    else:
+                        row[name] = None
+                self.check(table, row)
+                table.add(row)
+                written.append(row)
+        except APIError:
+            replaced_keys = {row[table.schema.primary_key] for row in replaced}
+            for row in reversed(written):
+                if row[table.schema.primary_key] not in replaced_keys:
+                    table.discard(row)
+            for row in replaced:
+                table.discard(table.rows[row[table.schema.primary_key]])
+                table.add(row)
+            raise
+        return written
+
+    def find(self, table: MemoryTable, columns: Tuple[str, ...], values: dict) -> Optional[dict]:
+        key = tuple(values.get(column) for column in columns)
+        if columns == (table.schema.primary_key,):
+            return table.rows.get(key[0])
+        index = table.unique.get(columns)
+        if index is None:
+            raise api_error(
+                "42P10", "there is no unique or exclusion constraint matching the ON CONFLICT specification"
+            )
+        primary_key = index.get(key)
+        return table.rows.get(primary_key) if primary_key is not None else None
+
+    def update(self, table: MemoryTable, row: dict, values: dict, converted: bool = False) -> dict:
+        changes = values if converted else self.convert(table, values)
+        updated = {**row, **changes}
+        if table.schema.touch_updated_at:
+            updated["updated_at"] = now()
+
+        primary_key = table.schema.primary_key
+        if updated[primary_key] != row[primary_key]:
+            raise api_error(PARSE_ERROR, "Changing a primary key is not supported")
+        self.check(table, updated, row[primary_key])
+        table.discard(row)
+        table.add(updated)
+        return updated
+
+    def delete(self, table: MemoryTable, row: dict):
+        for child_name, column, cascade in self.references.get(table.schema.name, []):
+            child = self.tables[child_name]
+            referenced_column = child.schema.foreign_keys[column][1]
+            keys = child.lookup(column, row[referenced_column]) or set()
+            if keys and not cascade:
+                raise api_error(
+                    FOREIGN_KEY_VIOLATION,
+                    f'update or delete on table "{table.schema.name}" violates foreign key constraint '
+                    f'"{child_name}_{column}_fkey" on table "{child_name}"'
+                )
+            for key in list(keys):
+                if key in child.rows:
+                    self.delete(child, child.rows[key])
+        table.discard(row)
+
+    # SQL functions from database_schema.sql
+
+    COUNTER_COLUMNS = {
+        ("groups", "members_count"),
+        ("events", "attendees_count"),
+        ("courses", "enrolled_count"),
+        ("content", "views"),
+        ("content", "likes"),
+        ("content", "shares"),
+    }
+
+    def apply_counter_deltas(self, params: dict):
+        # The SQL function is one transaction, so every entry is checked and
+        # staged before any row changes; a bad entry leaves nothing applied
+        staged: Dict[Tuple[str, Any], dict] = {}
+        for entry in params.get("p_deltas", []):
+            if (entry["table"], entry["column"]) not in self.COUNTER_COLUMNS:
+                raise api_error("P0001", f"Unknown counter {entry['table']}.{entry['column']}")
+            table = self.tables[entry["table"]]
+            key = table.schema.columns["id"].convert(entry["id"])
+            row = table.rows.get(key)
+            if row is not None:
+                changes = staged.setdefault((entry["table"], key), {})
+                current = changes.get(entry["column"], row.get(entry["column"]))
+                changes[entry["column"]] = max(0, (current or 0) + int(entry["delta"]))
+
+        for (name, key), changes in staged.items():
+            table = self.tables[name]
+            self.update(table, table.rows[key], changes)
+        return None
+
+    def record_activity(self, params: dict) -> int:
+        table = self.tables["heatmap_data"]
+        count = params.get("p_count", 1)
+        values = self.convert(table, {"user_id": params["p_user_id"], "date": params["p_date"]})
+        existing = self.find(table, ("user_id", "date"), values)
+
+        activities = ((existing or {}).get("activities") or []) + [params["p_activity"]] * count
+        level = sum(1 for threshold in params["p_thresholds"] if threshold <= len(activities))
+        if existing is None:
+            row = {name: column.default() if column.default else None for name, column in table.schema.columns.items()}
+            row.update(values, level=level, activities=activities)
+            self.check(table, row)
+            table.add(row)
+        else:
+            self.update(table, existing, {"level": level, "activities": activities}, converted=True)
+        return level
+
+class MemorySupabaseClient:
+    """Drop-in for the supabase Client's table() and rpc() entry points."""
+
+    def __init__(self, database: Optional[MemoryDatabase] = None, latency: float = 0.0):
+        self.database = database or MemoryDatabase(latency=latency)
+
+    def table(self, table_name: str) -> MemoryQuery:
+        return MemoryQuery(self.database, table_name)
+
+    def from_(self, table_name: str) -> MemoryQuery:
+        return self.table(table_name)
+
+    def rpc(self, function_name: str, params: Optional[dict] = None) -> MemoryQuery:
+        return MemoryQuery(self.database, function_name, "rpc", params)
@@ -0,0 +1,118 @@
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+from app.core.config import settings
+
+# Prometheus label values may not contain raw quotes, backslashes or newlines
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def describe_query(query) -> Tuple[str, str]:
+    """(table, operation) for a query builder, without building the request."""
+    request = getattr(query, "request", None)
+    if request is None:
+        # Mock and in-memory builders
+        return getattr(query, "table_name", "unknown"), getattr(query, "operation", "query")
+
+    path = str(request.path).rstrip("/")
+    prefix, _, name = path.rpartition("/")
+    if prefix.endswith("/rpc"):
+        return name, "rpc"
+
+    method = request.http_method
+    if method == "POST":
+        prefer = request.headers.get("Prefer", "")
+        return name, "upsert" if "resolution=" in prefer else "insert"
+    return name, {"GET": "select", "HEAD": "count", "PATCH": "update", "DELETE": "delete"}.get(method, method.lower())
+
+def route_template(scope: dict) -> str:
+    """The matched route as a template, e.g. /api/groups/{group_id}/members."""
+    if scope.get("route") is None:
+        # Unmatched paths would make the label unbounded
+        return "unmatched"
+
+    names = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    return "/".join(f"{{{names[segment]}}}" if segment in names else segment for segment in scope["path"].split("/"))
+
+class Histogram:
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; cumulated only when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip([*self.buckets, "+Inf"], self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+class MetricsService:
+    """Process-wide query and request metrics in Prometheus text format.
+
+    Observations are plain dict and list updates on the event loop, so
+    they are cheap enough to leave on in production. Request labels use
+    the matched route template, never the raw path, to keep cardinality
+    bounded.
+    """
+
+    def __init__(self):
+        self.queries: Dict[Tuple[str, str], Histogram] = {}
+        self.query_errors: Dict[Tuple[str, str], int] = {}
+        self.requests: Dict[Tuple[str, str, int], Histogram] = {}
+        self.slow_requests = 0
+
+    def observe_query(self, table: str, operation: str, seconds: float, failed: bool = False):
+        key = (table, operation)
+        histogram = self.queries.get(key)
+        if histogram is None:
+            histogram = self.queries[key] = Histogram(settings.METRICS_LATENCY_BUCKETS)
+        histogram.observe(seconds)
+        if failed:
+            self.query_errors[key] = self.query_errors.get(key, 0) + 1
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, status)
+        histogram = self.requests.get(key)
+        if histogram is None:
+            histogram = self.requests[key] = Histogram(settings.METRICS_LATENCY_BUCKETS)
+        histogram.observe(seconds)
+
+    def render(self, gauges: Dict[str, float]) -> str:
+        lines = [
+            "# HELP supabase_query_duration_seconds Supabase query latency by table and operation.",
+            "# TYPE supabase_query_duration_seconds histogram"
+        ]
+        for (table, operation), histogram in sorted(self.queries.items()):
+            labels = f'table="{escape_label(table)}",operation="{operation}"'
+            lines.extend(histogram.render("supabase_query_duration_seconds", labels))
+
+        lines.append("# HELP supabase_query_errors_total Failed Supabase queries by table and operation.")
+        lines.append("# TYPE supabase_query_errors_total counter")
+        for (table, operation), count in sorted(self.query_errors.items()):
+            lines.append(f'supabase_query_errors_total{{table="{escape_label(table)}",operation="{operation}"}} {count}')
+
+        lines.append("# HELP http_request_duration_seconds Request latency by route template and status.")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route, status), histogram in sorted(self.requests.items()):
+            labels = f'method="{method}",route="{escape_label(route)}",status="{status}"'
+            lines.extend(histogram.render("http_request_duration_seconds", labels))
+
+        lines.append("# HELP http_slow_requests_total Requests slower than SLOW_REQUEST_THRESHOLD_MS.")
+        lines.append("# TYPE http_slow_requests_total counter")
+        lines.append(f"http_slow_requests_total {self.slow_requests}")
+
+        for name, value in gauges.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+# Create a singleton instance
+metrics_service = MetricsService()
@@ -0,0 +1,116 @@
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Any, Awaitable, Callable, List, Optional
+from app.core.config import settings
+from app.services.supabase import supabase_service
+from datetime import datetime
+import base64
+import json
+import uuid
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Sort columns that are not timestamps. Cursor values are checked against
+# the column type, so a tampered cursor is a 400 rather than a 22007/22P02
+INTEGER_SORT_COLUMNS = ("views", "likes", "members_count")
+TEXT_SORT_COLUMNS = ("date",)
+
+def encode_cursor(row: dict, sort_column: str) -> str:
+    payload = json.dumps([sort_column, row.get(sort_column), row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_column: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        column, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if column != sort_column:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+
+    if not isinstance(row_id, str) or not valid_cursor_value(value, sort_column):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        # Canonical form; uuid.UUID also takes spellings Postgres rejects
+        row_id = str(uuid.UUID(row_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return value, row_id
+
+def valid_cursor_value(value: Any, sort_column: str) -> bool:
+    if value is None:
+        return True
+    if sort_column in INTEGER_SORT_COLUMNS:
+        # INTEGER columns; bool is an int subclass but not a valid value
+        return type(value) is int and -2 ** 31 <= value < 2 ** 31
+    if not isinstance(value, str) or "\x00" in value:
+        return False
+    if sort_column in TEXT_SORT_COLUMNS:
+        return True
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+def quote(value: Any) -> str:
+    # PostgREST reserves commas and parentheses inside or() filters
+    return '"' + str(value).replace('"', '\\"') + '"'
+
+def paginate(query, sort_column: str, limit: int, offset: int = 0, cursor: Optional[str] = None):
+    """Order by (sort_column, id) descending and page by cursor, or by offset if no cursor is given."""
+    query = query.order(sort_column, desc=True).order("id", desc=True)
+
+    if cursor is None:
+        return query.limit(limit).offset(offset)
+
+    value, row_id = decode_cursor(cursor, sort_column)
+    if value is None:
+        # Descending order puts NULLs first, so every non-NULL row comes next
+        return query.or_(
+            f"{sort_column}.not.is.null,"
+            f"and({sort_column}.is.null,id.lt.{quote(row_id)})"
+        ).limit(limit)
+
+    query = query.or_(
+        f"{sort_column}.lt.{quote(value)},"
+        f"and({sort_column}.eq.{quote(value)},id.lt.{quote(row_id)})"
+    )
+    return query.limit(limit)
+
+def set_next_cursor(response: Response, rows: List[dict], sort_column: str, limit: int):
+    if rows and len(rows) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1], sort_column)
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+async def stream_ndjson(
+    build_query: Callable[[], Any],
+    sort_column: str,
+    on_empty: Optional[Callable[[], Awaitable[None]]] = None
+) -> StreamingResponse:
+    """Stream every row of a query as NDJSON, one keyset page at a time.
+
+    build_query must return a fresh filtered query on each call. Only one
+    page of STREAM_PAGE_SIZE rows is held in memory at once. The first page
+    is fetched before the response starts so on_empty can still raise an
+    HTTP error (e.g. a 404 for a missing parent).
+    """
+    page_size = settings.STREAM_PAGE_SIZE
+    rows = (await supabase_service.execute(paginate(build_query(), sort_column, page_size))).data
+    if not rows and on_empty is not None:
+        await on_empty()
+
+    async def lines(rows: List[dict]):
+        while True:
+            yield "".join(json.dumps(row, default=str) + "\n" for row in rows)
+            if len(rows) < page_size:
+                return
+            cursor = encode_cursor(rows[-1], sort_column)
+            rows = (await supabase_service.execute(paginate(build_query(), sort_column, page_size, cursor=cursor))).data
+
+    return StreamingResponse(lines(rows), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,124 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.supabase import supabase_service
+import asyncio
+import heapq
+import time
+
+class MemoryRevocationStore:
+    """Local stand-in: revocations live only in this process."""
+
+    async def add(self, jti: str, expires_at: float):
+        pass
+
+    async def changes(self, cursor: Optional[str]) -> Tuple[List[Tuple[str, float]], Optional[str]]:
+        return [], cursor
+
+    async def purge(self, now: float):
+        pass
+
+class SupabaseRevocationStore:
+    """Shared store in the revoked_tokens table, so every worker sees a logout."""
+
+    async def add(self, jti: str, expires_at: float):
+        supabase = supabase_service.get_client()
+        await supabase_service.execute(supabase.table("revoked_tokens").upsert({
+            "jti": jti,
+            "expires_at": datetime.fromtimestamp(expires_at, timezone.utc).isoformat()
+        }))
+
+    async def changes(self, cursor: Optional[str]) -> Tuple[List[Tuple[str, float]], Optional[str]]:
+        """Return revocations made after cursor (all live ones if None) and the new cursor."""
+        supabase = supabase_service.get_client()
+        query = supabase.table("revoked_tokens").select("jti, expires_at, revoked_at")
+        if cursor is None:
+            query = query.gt("expires_at", datetime.now(timezone.utc).isoformat())
+        else:
+            query = query.gt("revoked_at", cursor)
+        rows = (await supabase_service.execute(query.order("revoked_at"))).data
+
+        entries = [(row["jti"], datetime.fromisoformat(row["expires_at"]).timestamp()) for row in rows]
+        return entries, rows[-1]["revoked_at"] if rows else cursor
+
+    async def purge(self, now: float):
+        supabase = supabase_service.get_client()
+        await supabase_service.execute(supabase.table("revoked_tokens").delete().lt(
+            "expires_at", datetime.fromtimestamp(now, timezone.utc).isoformat()
+        ))
+
+class RevocationService:
+    """Revoked token ids, checked on every authenticated request.
+
+    The in-process set gives an O(1) membership check without a database
+    round trip. A min-heap ordered by expiry drops each entry once its
+    token would have expired anyway, so the set only ever holds tokens
+    that are still otherwise valid.
+    """
+
+    def __init__(self):
+        self.revoked: Dict[str, float] = {}
+        self.expiries: List[Tuple[float, str]] = []
+        self.cursor: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self.store = MemoryRevocationStore()
+
+        if settings.REVOCATION_BACKEND == "supabase":
+            self.store = SupabaseRevocationStore()
+
+    def add(self, jti: str, expires_at: float):
+        if jti not in self.revoked:
+            heapq.heappush(self.expiries, (expires_at, jti))
+        self.revoked[jti] = expires_at
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti is not None and jti in self.revoked
+
+    async def revoke(self, jti: str, expires_at: float):
+        self.add(jti, expires_at)
+        await self.store.add(jti, expires_at)
+
+    def collect(self, now: float) -> int:
+        expiries = self.expiries
+        collected = 0
+        while expiries and expiries[0][0] <= now:
+            _, jti = heapq.heappop(expiries)
+            self.revoked.pop(jti, None)
+            collected += 1
+        return collected
+
+    async def sync(self):
+        entries, self.cursor = await self.store.changes(self.cursor)
+        for jti, expires_at in entries:
+            self.add(jti, expires_at)
+
+    async def run(self):
+        while True:
+            now = time.time()
+            collected = self.collect(now)
+            try:
+                await self.sync()
+                if collected:
+                    await self.store.purge(now)
+            except Exception as e:
+                print(f"Revocation sync failed: {e}")
+            await asyncio.sleep(settings.REVOCATION_SYNC_INTERVAL)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.store).__name__,
+            "revoked": len(self.revoked),
+            "next_expiry": self.expiries[0][0] if self.expiries else None
+        }
+
+# Create a singleton instance
+revocation_service = RevocationService()
@@ -0,0 +1,353 @@
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from app.core.config import settings
+from app.services.supabase import supabase_service
+from app.services.pagination import paginate, encode_cursor
+import asyncio
+import bisect
+import heapq
+import itertools
+import math
+import re
+
+SEARCH_TABLES = ("content", "groups", "events", "courses")
+
+# Groups use "name" where the other tables use "title"
+TITLE_COLUMNS = {"content": "title", "groups": "name", "events": "title", "courses": "title"}
+
+TITLE_BOOST = 2
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Runs of CJK ideographs/kana/hangul, or runs of latin letters and digits
+TOKEN_PATTERN = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]+|[^\W_]+")
+CJK_PATTERN = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into index terms.
+
+    CJK text has no word boundaries, so CJK runs are indexed as overlapping
+    character bigrams ("量子计算" -> "量子", "子计", "计算"). A lone CJK
+    character is kept as a unigram. Everything else is lowercased words.
+    """
+    if not text:
+        return []
+
+    tokens = []
+    for run in TOKEN_PATTERN.findall(text):
+        if CJK_PATTERN.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run.lower())
+    return tokens
+
+# Posting keys pack (255 - tf, document length, document number) into 64
+# bits, so a term's sorted postings are runs of equal tf, each ordered by
+# increasing length, that is by decreasing BM25 contribution
+TF_SHIFT = 56
+LENGTH_SHIFT = 32
+MAX_TF = 0xFF
+MAX_LENGTH = 0xFFFFFF
+NUMBER_MASK = 0xFFFFFFFF
+
+# Lists shorter than this take new keys in place; longer ones collect them
+# in an unsorted tail that is merged in once it reaches 1/8 of the list
+INSERT_IN_PLACE = 4096
+
+# Postings each essential cursor reads between threshold checks
+SEARCH_READ_BATCH = 16
+
+def posting_key(frequency: int, length: int, number: int) -> int:
+    return ((MAX_TF - frequency) << TF_SHIFT) | (min(length, MAX_LENGTH) << LENGTH_SHIFT) | number
+
+def contribution(weight: float, frequency: int, length: int, base: float, slope: float) -> float:
+    return weight * frequency / (frequency + base + slope * min(length, MAX_LENGTH))
+
+class TermCursor:
+    """Sorted access to one query term's postings, best contribution first.
+
+    Each run of equal tf is already in decreasing contribution order, so the
+    runs are merged on a heap keyed by the contribution of their next posting.
+    """
+
+    def __init__(self, sources: List[Sequence[int]], weight: float, base: float, slope: float):
+        self.weight = weight
+        self.base = base
+        self.slope = slope
+        # (sorted keys, tf, end)
+        self.runs = []
+        self.heap = []
+        for source in sources:
+            start = 0
+            while start < len(source):
+                frequency = MAX_TF - (source[start] >> TF_SHIFT)
+                end = bisect.bisect_left(source, (MAX_TF - frequency + 1) << TF_SHIFT, start)
+                self.heap.append((-self.contribution(frequency, source[start]), len(self.runs), start))
+                self.runs.append((source, frequency, end))
+                start = end
+        heapq.heapify(self.heap)
+
+    def contribution(self, frequency: int, key: int) -> float:
+        return contribution(self.weight, frequency, (key >> LENGTH_SHIFT) & MAX_LENGTH, self.base, self.slope)
+
+    def bound(self) -> float:
+        """Upper bound on the contribution of any posting not yet returned."""
+        return -self.heap[0][0] if self.heap else 0.0
+
+    def next(self) -> Optional[int]:
+        if not self.heap:
+            return None
+
+        _, run, position = self.heap[0]
+        source, frequency, end = self.runs[run]
+        number = source[position] & NUMBER_MASK
+        position += 1
+        if position < end:
+            heapq.heapreplace(self.heap, (-self.contribution(frequency, source[position]), run, position))
+        else:
+            heapq.heappop(self.heap)
+        return number
+
+class SearchIndex:
+    """In-process inverted index with BM25 ranking.
+
+    Each term's postings are a sorted array of packed keys (see
+    posting_key), 8 bytes per posting, plus an unsorted tail for long lists
+    that are still growing. search() is exact top-k with the threshold
+    algorithm: it reads every query term's postings best first and stops as
+    soon as the k-th best score so far beats anything an unread document
+    could reach. Terms are also kept in a list that is sorted on demand, so
+    the last query term can be expanded as a prefix for typeahead with a
+    binary search.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, array] = {}
+        self.tails: Dict[str, List[int]] = {}
+        self.unsorted_tails: Set[str] = set()
+        self.terms: List[str] = []
+        self.terms_sorted = True
+        self.doc_numbers: Dict[Tuple[str, str], int] = {}
+        self.docs: Dict[int, tuple] = {}
+        self.next_number = 0
+        self.total_length = 0
+        self.task: Optional[asyncio.Task] = None
+        self.ready = False
+
+    def document_terms(self, table: str, row: dict) -> Dict[str, int]:
+        frequencies: Dict[str, int] = defaultdict(int)
+        for term in tokenize(row.get(TITLE_COLUMNS[table])):
+            frequencies[term] += TITLE_BOOST
+        for term in tokenize(row.get("description")):
+            frequencies[term] += 1
+        for tag in row.get("tags") or []:
+            for term in tokenize(tag):
+                frequencies[term] += 1
+        return frequencies
+
+    def add(self, table: str, row: dict):
+        key = (table, str(row["id"]))
+        self.remove(*key)
+
+        frequencies = self.document_terms(table, row)
+        number = self.next_number & NUMBER_MASK
+        self.next_number += 1
+        self.doc_numbers[key] = number
+
+        length = sum(frequencies.values())
+        capped = bytes(min(frequency, MAX_TF) for frequency in frequencies.values())
+        # Terms never contain spaces; one string per document is far smaller than a tuple of them
+        self.docs[number] = (table, key[1], row.get(TITLE_COLUMNS[table]), length, " ".join(frequencies), capped)
+        self.total_length += length
+
+        for term, frequency in zip(frequencies, capped):
+            self.insert(term, posting_key(frequency, length, number))
+
+    def insert(self, term: str, key: int):
+        postings = self.postings.get(term)
+        if postings is None:
+            self.postings[term] = array("Q", (key,))
+            self.terms.append(term)
+            self.terms_sorted = False
+        elif len(postings) < INSERT_IN_PLACE:
+            bisect.insort(postings, key)
+        else:
+            tail = self.tails.setdefault(term, [])
+            tail.append(key)
+            self.unsorted_tails.add(term)
+            if len(tail) > len(postings) >> 3:
+                self.postings[term] = array("Q", sorted(itertools.chain(postings, tail)))
+                del self.tails[term]
+                self.unsorted_tails.discard(term)
+
+    def remove(self, table: str, row_id: str):
+        number = self.doc_numbers.pop((table, str(row_id)), None)
+        if number is None:
+            return
+
+        _, _, _, length, terms, frequencies = self.docs.pop(number)
+        self.total_length -= length
+        for term, frequency in zip(terms.split(" "), frequencies):
+            key = posting_key(frequency, length, number)
+            postings = self.postings[term]
+            index = bisect.bisect_left(postings, key)
+            if index < len(postings) and postings[index] == key:
+                del postings[index]
+            else:
+                tail = self.tails[term]
+                tail.remove(key)
+                if not tail:
+                    del self.tails[term]
+                    self.unsorted_tails.discard(term)
+            # Empty terms stay in self.postings and self.terms; expand_prefix skips them
+
+    def sources(self, term: str) -> List[Sequence[int]]:
+        postings = self.postings.get(term)
+        if postings is None:
+            return []
+        tail = self.tails.get(term)
+        if tail is None:
+            return [postings]
+        if term in self.unsorted_tails:
+            tail.sort()
+            self.unsorted_tails.discard(term)
+        return [postings, tail]
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        if not self.terms_sorted:
+            # New terms are appended unsorted; Timsort merges the tail cheaply
+            self.terms.sort()
+            self.terms_sorted = True
+
+        matches = []
+        index = bisect.bisect_left(self.terms, prefix)
+        while index < len(self.terms) and self.terms[index].startswith(prefix):
+            term = self.terms[index]
+            if self.postings[term] or term in self.tails:
+                matches.append(term)
+                if len(matches) >= settings.SEARCH_MAX_PREFIX_TERMS:
+                    break
+            index += 1
+        return matches
+
+    def search(self, query: str, tables: Optional[List[str]] = None, limit: int = 20, prefix: bool = True) -> List[dict]:
+        terms = tokenize(query)
+        if not terms or not self.docs:
+            return []
+
+        # Each entry is a list of alternatives; the last one may be a prefix expansion
+        term_groups = [[term] for term in dict.fromkeys(terms)]
+        if prefix:
+            term_groups[-1] = self.expand_prefix(terms[-1]) or term_groups[-1]
+
+        doc_count = len(self.docs)
+        docs = self.docs
+        # BM25 length normalisation is base + slope * document length
+        base = BM25_K1 * (1 - BM25_B)
+        slope = BM25_K1 * BM25_B * doc_count / self.total_length
+
+        weights: Dict[str, float] = defaultdict(float)
+        cursors = []
+        for term in itertools.chain.from_iterable(term_groups):
+            sources = self.sources(term)
+            size = sum(len(source) for source in sources)
+            if size:
+                idf = math.log(1 + (doc_count - size + 0.5) / (size + 0.5))
+                weights[term] += idf * (BM25_K1 + 1)
+                cursors.append(TermCursor(sources, idf * (BM25_K1 + 1), base, slope))
+
+        # Min-heap of the best (score, document number) found so far. Every
+        # document reached is scored in full from its own term list, so an
+        # unread one can score at most the sum of the cursors' bounds.
+        # Cursors whose bounds together cannot lift a document past the k-th
+        # score are not advanced (max-score); their documents are either
+        # reached through another term or cannot make the top k
+        top: List[Tuple[float, int]] = []
+        seen: Set[int] = set()
+        while True:
+            kth = top[0][0] if len(top) == limit else 0.0
+            bounds = sorted((cursor.bound(), position) for position, cursor in enumerate(cursors))
+            if sum(bound for bound, _ in bounds) <= kth:
+                break
+
+            essential = []
+            remaining = 0.0
+            for bound, position in bounds:
+                remaining += bound
+                if remaining > kth:
+                    essential.append(cursors[position])
+
+            # Reading a few postings past the stopping point is cheaper than
+            # re-deciding after every one
+            for _ in range(SEARCH_READ_BATCH):
+                for cursor in essential:
+                    number = cursor.next()
+                    if number is None or number in seen:
+                        continue
+                    seen.add(number)
+
+                    table, _, _, length, doc_terms, frequencies = docs[number]
+                    if tables and table not in tables:
+                        continue
+                    norm = base + slope * min(length, MAX_LENGTH)
+                    score = 0.0
+                    for term, frequency in zip(doc_terms.split(" "), frequencies):
+                        if term in weights:
+                            score += weights[term] * frequency / (frequency + norm)
+                    if len(top) < limit:
+                        heapq.heappush(top, (score, number))
+                    elif score > top[0][0]:
+                        heapq.heapreplace(top, (score, number))
+
+        results = []
+        for score, number in sorted(top, key=lambda entry: entry[0], reverse=True):
+            table, row_id, title, _, _, _ = docs[number]
+            results.append({"type": table, "id": row_id, "title": title, "score": round(score, 4)})
+        return results
+
+    async def bootstrap(self):
+        supabase = supabase_service.get_client()
+        batch = settings.SEARCH_BOOTSTRAP_BATCH
+
+        for table in SEARCH_TABLES:
+            columns = f"id, {TITLE_COLUMNS[table]}, description, tags, created_at"
+            cursor = None
+            while True:
+                query = paginate(supabase.table(table).select(columns), "created_at", batch, cursor=cursor)
+                rows = (await supabase_service.execute(query)).data
+                for row in rows:
+                    self.add(table, row)
+                if len(rows) < batch:
+                    break
+                cursor = encode_cursor(rows[-1], "created_at")
+
+        self.ready = True
+
+    async def run(self):
+        try:
+            await self.bootstrap()
+        except Exception as e:
+            print(f"Search index bootstrap failed: {e}")
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "documents": len(self.docs),
+            "terms": len(self.postings)
+        }
+
+# Create a singleton instance
+search_index = SearchIndex()
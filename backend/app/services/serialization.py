@@ -0,0 +1,124 @@
+from functools import lru_cache
+from typing import Any, FrozenSet, List, Optional, Tuple, Type
+from fastapi import HTTPException, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter, create_model
+from app.core.config import settings
+from app.services.memory_postgrest import SCHEMA_PATH, parse_schema
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Partial models and their adapters are built per (model, fields); bounded so
+# clients cannot grow memory by requesting new field combinations
+MODEL_CACHE_SIZE = 256
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=str)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+@lru_cache(maxsize=None)
+def table_columns(table: str) -> FrozenSet[str]:
+    """Column names of a table, from database_schema.sql."""
+    return frozenset(parse_schema(SCHEMA_PATH.read_text(encoding="utf-8"))[table].columns)
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel], table: str) -> Optional[Tuple[str, ...]]:
+    """Validate a fields= query parameter against a response model and its table.
+
+    Only model fields backed by a real column can be selected. Returns None
+    when no projection was requested. id is always included, and fields
+    come back in the model's declaration order, so every permutation of
+    the same fields maps to one cached partial model.
+    """
+    if not fields:
+        return None
+
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    columns = table_columns(table)
+    unknown = [name for name in requested if name not in model.model_fields or name not in columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    wanted = {"id", *requested}
+    return tuple(name for name in model.model_fields if name in wanted)
+
+def select_columns(fields: Optional[Tuple[str, ...]], *extra: str) -> str:
+    """Column list for select(); extra columns (e.g. a cursor's sort column) are fetched but not returned."""
+    if fields is None:
+        return "*"
+    return ",".join(dict.fromkeys([*fields, *extra]))
+
+@lru_cache(maxsize=MODEL_CACHE_SIZE)
+def partial_model(model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    return create_model(
+        f"Partial{model.__name__}",
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields}
+    )
+
+@lru_cache(maxsize=MODEL_CACHE_SIZE)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+@lru_cache(maxsize=MODEL_CACHE_SIZE)
+def projection(model: Type[BaseModel]) -> Tuple[Tuple[str, Any], ...]:
+    """(field name, default) pairs of a response model, in declaration order."""
+    return tuple(
+        (name, None if field.is_required() else field.get_default(call_default_factory=True))
+        for name, field in model.model_fields.items()
+    )
+
+def render(body: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    fast = FastJSONResponse(body)
+    if response is not None:
+        # FastAPI only merges headers set on the injected Response when it builds the response itself
+        fast.headers.raw.extend(response.headers.raw)
+    return fast
+
+def serialize_rows(
+    rows: List[dict],
+    model: Type[BaseModel],
+    response: Optional[Response] = None,
+    fields: Optional[Tuple[str, ...]] = None
+):
+    """Return database rows for a List[model] endpoint.
+
+    Rows straight from the database already match their response model, so
+    by default they are only projected onto the model's fields (which still
+    drops columns such as password hashes) and rendered directly, skipping
+    per-row Pydantic validation. With RESPONSE_VALIDATION_STRICT the rows
+    are validated, by FastAPI through response_model or, for a fields=
+    projection, through the matching partial model.
+    """
+    if fields is not None:
+        model = partial_model(model, fields)
+
+    if settings.RESPONSE_VALIDATION_STRICT:
+        if fields is None:
+            return rows
+        adapter = list_adapter(model)
+        return render(adapter.dump_python(adapter.validate_python(rows), mode="json"), response)
+
+    columns = projection(model)
+    return render([{name: row.get(name, default) for name, default in columns} for row in rows], response)
+
+def serialize_row(
+    row: dict,
+    model: Type[BaseModel],
+    fields: Optional[Tuple[str, ...]] = None,
+    response: Optional[Response] = None
+):
+    """Return a database row for a detail endpoint, projected if fields= was given."""
+    if fields is None:
+        return row
+
+    model = partial_model(model, fields)
+    if settings.RESPONSE_VALIDATION_STRICT:
+        return render(model.model_validate(row).model_dump(mode="json"), response)
+    return render({name: row.get(name, default) for name, default in projection(model)}, response)
@@ -0,0 +1,76 @@
+import asyncio
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+def query_key(query) -> Optional[Hashable]:
+    """Identity of a read (table, filters, projection, modifiers); None for writes and rpc."""
+    request = getattr(query, "request", None)
+    if request is None:
+        # In-memory builders
+        if getattr(query, "operation", None) != "select":
+            return None
+        return (query.table_name, query.columns, query.count_mode, repr(query.terms))
+
+    if request.http_method not in ("GET", "HEAD"):
+        return None
+    headers = request.headers
+    # Prefer carries count=, Accept turns single() into an object response
+    return (request.http_method, str(request.path), str(request.params), headers.get("prefer"), headers.get("accept"))
+
+class SingleFlight:
+    """Concurrent identical reads share one in-flight backend call.
+
+    The call runs as its own task, so a caller that is cancelled (client
+    disconnect) does not fail the others waiting on it. Writes bump the
+    table's generation before and after they run, and rpc calls bump a
+    global epoch, so a read that starts after a write never joins a
+    flight that may have read the old rows. Callers share the result
+    object and must treat it as read-only, as they already do for cached
+    rows.
+    """
+
+    def __init__(self):
+        self.flights: Dict[Hashable, asyncio.Task] = {}
+        self.generations: Dict[str, int] = defaultdict(int)
+        self.epoch = 0
+        self.calls = 0
+        self.collapsed = 0
+
+    def key(self, table: str, query) -> Optional[Hashable]:
+        identity = query_key(query)
+        if identity is None:
+            return None
+        return (self.epoch, self.generations[table], identity)
+
+    def invalidate(self, table: str, operation: str):
+        if operation == "rpc":
+            self.epoch += 1
+        else:
+            self.generations[table] += 1
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable]):
+        task = self.flights.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(call())
+            self.flights[key] = task
+            task.add_done_callback(lambda done: self.finish(key, done))
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def finish(self, key: Hashable, task: asyncio.Task):
+        if self.flights.get(key) is task:
+            del self.flights[key]
+        # Mark the exception retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        requested = self.calls + self.collapsed
+        return {
+            "in_flight": len(self.flights),
+            "backend_calls": self.calls,
+            "collapsed": self.collapsed,
+            "collapse_ratio": round(self.collapsed / requested, 4) if requested else 0.0
+        }
@@ -1,64 +1,160 @@
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+from postgrest.exceptions import APIError
 from app.core.config import settings
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from app.services.metrics import metrics_service, describe_query
+from app.services.memory_postgrest import MemorySupabaseClient
+from app.services.single_flight import SingleFlight
+import asyncio
+import importlib.util
+import httpx
 import sys
+import time
+import uuid
 
-class MockSupabaseClient:
-    def table(self, table_name):
-        return MockTable(table_name)
+# PostgreSQL error codes surfaced by PostgREST
+UNIQUE_VIOLATION = "23505"
+FOREIGN_KEY_VIOLATION = "23503"
 
-class MockTable:
-    def __init__(self, table_name):
-        self.table_name = table_name
-    
-    def select(self, *args):
-        return self
-    
-    def eq(self, *args):
-        return self
-    
-    def order(self, *args, **kwargs):
-        return self
-    
-    def limit(self, *args):
-        return self
-    
-    def offset(self, *args):
-        return self
-    
-    def insert(self, *args):
-        return self
-    
-    def update(self, *args):
-        return self
-    
-    def delete(self, *args):
-        return self
-    
-    def execute(self):
-        return MockExecuteResult()
+READ_OPERATIONS = ("select", "count")
 
-class MockResponse:
-    def execute(self):
-        return MockExecuteResult()
+def is_uuid(value) -> bool:
+    # Ids are UUID columns; any other value fails the whole query with 22P02
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
 
-class MockExecuteResult:
+class QueryCounter:
     def __init__(self):
-        self.data = []
+        self.count = 0
+        self.seconds = 0.0
+        # (table, operation, seconds) per query, for Server-Timing and the slow request log
+        self.queries = []
+    
+    def record(self, table: str, operation: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.queries.append((table, operation, seconds))
+
+# Set per request by the query counting middleware in main.py
+query_counter: ContextVar = ContextVar("query_counter", default=None)
+
+def apply_table_timeout(request: httpx.Request):
+    # PostgREST URLs end with the table name, e.g. /rest/v1/content
+    table = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+    read_timeout = settings.SUPABASE_TABLE_READ_TIMEOUTS.get(table)
+    if read_timeout is not None:
+        request.extensions["timeout"] = httpx.Timeout(
+            read_timeout, connect=settings.SUPABASE_CONNECT_TIMEOUT
+        ).as_dict()
+
+def create_http_client() -> httpx.Client:
+    http2 = settings.SUPABASE_HTTP2
+    if http2 and importlib.util.find_spec("h2") is None:
+        print("SUPABASE_HTTP2 is enabled but the h2 package is not installed, using HTTP/1.1")
+        http2 = False
+    
+    transport = httpx.HTTPTransport(
+        http2=http2,
+        retries=settings.SUPABASE_RETRIES,
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY
+        )
+    )
+    return httpx.Client(
+        transport=transport,
+        timeout=httpx.Timeout(
+            settings.SUPABASE_READ_TIMEOUT, connect=settings.SUPABASE_CONNECT_TIMEOUT
+        ),
+        follow_redirects=True,
+        event_hooks={"request": [apply_table_timeout]}
+    )
 
 class SupabaseService:
     def __init__(self):
-        try:
-            self.supabase: Client = create_client(
-                settings.SUPABASE_URL,
-                settings.SUPABASE_KEY
-            )
-        except Exception as e:
-            print(f"Supabase initialization failed: {e}")
-            print("Using mock Supabase client for testing")
-            self.supabase = MockSupabaseClient()
+        self.http_client = create_http_client()
+        self.in_flight = 0
+        self.single_flight = SingleFlight()
+        if settings.SUPABASE_BACKEND == "memory":
+            self.supabase = MemorySupabaseClient(latency=settings.SUPABASE_MEMORY_LATENCY_MS / 1000)
+        else:
+            try:
+                self.supabase: Client = create_client(
+                    settings.SUPABASE_URL,
+                    settings.SUPABASE_KEY,
+                    options=ClientOptions(httpx_client=self.http_client)
+                )
+            except Exception as e:
+                print(f"Supabase initialization failed: {e}")
+                print("Using in-memory PostgREST backend for testing")
+                self.supabase = MemorySupabaseClient(latency=settings.SUPABASE_MEMORY_LATENCY_MS / 1000)
+        
+        # The Supabase client is synchronous, so queries run on a bounded
+        # thread pool instead of blocking the event loop
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.SUPABASE_MAX_CONCURRENCY,
+            thread_name_prefix="supabase"
+        )
     
     def get_client(self):
         return self.supabase
+    
+    async def execute(self, query):
+        table, operation = describe_query(query)
+        key = self.single_flight.key(table, query) if settings.SUPABASE_SINGLE_FLIGHT_ENABLED else None
+        if key is not None:
+            # Identical concurrent reads share one backend call
+            return await self.single_flight.run(key, lambda: self.call(query, table, operation))
+        
+        write = operation not in READ_OPERATIONS
+        if write:
+            self.single_flight.invalidate(table, operation)
+        try:
+            return await self.call(query, table, operation)
+        finally:
+            if write:
+                self.single_flight.invalidate(table, operation)
+    
+    async def call(self, query, table: str, operation: str):
+        loop = asyncio.get_running_loop()
+        failed = True
+        started = time.perf_counter()
+        self.in_flight += 1
+        try:
+            result = await loop.run_in_executor(self.executor, query.execute)
+            failed = False
+            return result
+        finally:
+            self.in_flight -= 1
+            seconds = time.perf_counter() - started
+            # Collapsed reads are recorded once, on the request that issued the call
+            counter = query_counter.get()
+            if counter is not None:
+                counter.record(table, operation, seconds)
+            if settings.METRICS_ENABLED:
+                metrics_service.observe_query(table, operation, seconds, failed)
+    
+    def pool_stats(self) -> dict:
+        # httpx does not expose its connection pool publicly
+        pool = getattr(self.http_client._transport, "_pool", None)
+        connections = pool.connections if pool is not None else []
+        idle = sum(1 for connection in connections if connection.is_idle())
+        
+        return {
+            "max_concurrency": settings.SUPABASE_MAX_CONCURRENCY,
+            "queries_in_flight": self.in_flight,
+            "queries_queued": max(0, self.in_flight - settings.SUPABASE_MAX_CONCURRENCY),
+            "max_connections": settings.SUPABASE_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+            "open_connections": len(connections),
+            "active_connections": len(connections) - idle,
+            "idle_connections": idle
+        }
 
 # Create a singleton instance
 supabase_service = SupabaseService()
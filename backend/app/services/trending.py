@@ -0,0 +1,249 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.services.supabase import supabase_service, is_uuid
+import asyncio
+import heapq
+import math
+import time
+
+# Screen positions for the Discovery page hotspot cloud, hottest first
+HOTSPOT_SLOTS = [
+    {"top": "45%", "left": "60%", "color": "#7f13ec"},
+    {"top": "25%", "left": "30%", "color": "#a855f7"},
+    {"top": "65%", "left": "35%", "color": "#3b82f6"},
+    {"top": "15%", "left": "55%", "color": "#ec4899"},
+    {"top": "75%", "left": "55%", "color": "#3b82f6"},
+    {"top": "35%", "left": "15%", "color": "#f59e0b"},
+]
+
+METADATA_COLUMNS = "id, title, category, tags, views, likes, shares, comments_count, created_at"
+
+# Engagement kinds and the content columns holding their lifetime totals
+ENGAGEMENT_TOTALS = (("view", "views"), ("like", "likes"), ("share", "shares"), ("comment", "comments_count"))
+
+def format_count(value: float) -> str:
+    if value >= 10000:
+        return f"{value / 10000:.1f}w"
+    if value >= 1000:
+        return f"{value / 1000:.1f}k"
+    return str(int(value))
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+class TrendingItem:
+    __slots__ = ("short", "long", "updated_at", "first_seen", "title", "category", "tags", "stored", "recorded")
+
+    def __init__(self, now: float):
+        self.short = 0.0
+        self.long = 0.0
+        self.updated_at = now
+        self.first_seen = now
+        self.title: Optional[str] = None
+        self.category: Optional[str] = None
+        self.tags: List[str] = []
+        # Engagements in the row when its metadata was last read, and recorded since
+        self.stored = 0
+        self.recorded = 0
+
+    def count(self) -> int:
+        return self.stored + self.recorded
+
+    def decay(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.short *= 0.5 ** (elapsed / settings.TRENDING_SHORT_HALF_LIFE)
+            self.long *= 0.5 ** (elapsed / settings.TRENDING_LONG_HALF_LIFE)
+            self.updated_at = now
+
+    def short_rate(self) -> float:
+        return self.short * math.log(2) / settings.TRENDING_SHORT_HALF_LIFE
+
+    def long_rate(self) -> float:
+        return self.long * math.log(2) / settings.TRENDING_LONG_HALF_LIFE
+
+    def heat(self) -> float:
+        return self.short_rate() + self.long_rate()
+
+    def trend(self, now: float) -> str:
+        if now - self.first_seen < settings.TRENDING_NEW_SECONDS:
+            return "new"
+        # Compare the recent event rate against the long-run rate
+        return "up" if self.short_rate() > self.long_rate() * settings.TRENDING_UP_RATIO else "steady"
+
+class TrendingEngine:
+    """Time-decayed content scores kept up to date from engagement events.
+
+    Each item keeps two exponentially decayed scores (a short and a long
+    window) that are updated in O(1) per event, so no table scans are needed
+    after the initial bootstrap. A background task periodically builds an
+    immutable snapshot of the top items, the top items per category and the
+    hottest tags, which the endpoints serve directly.
+    """
+
+    def __init__(self):
+        self.items: Dict[str, TrendingItem] = {}
+        self.snapshot: dict = {"hot_chats": [], "categories": {}, "hotspots": []}
+        self.task: Optional[asyncio.Task] = None
+
+    def record(self, content_id: str, kind: str, count: int = 1):
+        now = time.time()
+        item = self.items.get(content_id)
+        if item is None:
+            item = self.items[content_id] = TrendingItem(now)
+        item.decay(now)
+
+        weight = settings.TRENDING_WEIGHTS.get(kind, 0) * count
+        item.short += weight
+        item.long += weight
+        item.recorded += count
+
+    def update_metadata(self, row: dict):
+        item = self.items.get(row["id"])
+        if item is None:
+            return
+        item.title = row.get("title", item.title)
+        item.category = row.get("category", item.category)
+        item.tags = row.get("tags") or item.tags
+        created_at = parse_timestamp(row.get("created_at"))
+        if created_at is not None:
+            item.first_seen = created_at
+        if any(column in row for _, column in ENGAGEMENT_TOTALS):
+            # Deltas still buffered in the counter service are not in the row yet
+            item.stored = sum(row.get(column) or 0 for _, column in ENGAGEMENT_TOTALS)
+            item.recorded = 0
+
+    def remove(self, content_id: str):
+        self.items.pop(content_id, None)
+
+    async def bootstrap(self):
+        supabase = supabase_service.get_client()
+        rows = (await supabase_service.execute(
+            supabase.table("content").select(METADATA_COLUMNS).order("views", desc=True).limit(settings.TRENDING_BOOTSTRAP_LIMIT)
+        )).data
+
+        now = time.time()
+        for row in rows:
+            item = self.items.setdefault(row["id"], TrendingItem(now))
+            # Lifetime totals only seed the long window; they decay like any other event
+            item.long += sum(
+                settings.TRENDING_WEIGHTS.get(kind, 0) * (row.get(column) or 0)
+                for kind, column in ENGAGEMENT_TOTALS
+            )
+            self.update_metadata(row)
+
+    async def load_missing_metadata(self):
+        missing = []
+        for content_id, item in list(self.items.items()):
+            if item.title is not None:
+                continue
+            # A non-UUID id would fail the in.() query, and with it every refresh
+            if not is_uuid(content_id):
+                self.remove(content_id)
+                continue
+            missing.append(content_id)
+        # Keep the id list short enough for a single PostgREST URL
+        missing = missing[:settings.TRENDING_METADATA_BATCH]
+        if not missing:
+            return
+
+        supabase = supabase_service.get_client()
+        rows = (await supabase_service.execute(
+            supabase.table("content").select(METADATA_COLUMNS).in_("id", missing)
+        )).data
+        found = set()
+        for row in rows:
+            found.add(row["id"])
+            self.update_metadata(row)
+
+        # Engagement for deleted or unknown content
+        for content_id in missing:
+            if content_id not in found:
+                self.remove(content_id)
+
+    def build_snapshot(self) -> dict:
+        now = time.time()
+        for item in self.items.values():
+            item.decay(now)
+
+        # Bound memory by dropping the coldest items
+        if len(self.items) > settings.TRENDING_MAX_ITEMS:
+            keep = heapq.nlargest(settings.TRENDING_MAX_ITEMS, self.items.items(), key=lambda entry: entry[1].long)
+            self.items = dict(keep)
+
+        ranked = [(content_id, item) for content_id, item in self.items.items() if item.title is not None]
+        top_k = settings.TRENDING_TOP_K
+
+        def chat(content_id: str, item: TrendingItem) -> dict:
+            return {
+                "id": content_id,
+                "topic": item.title,
+                "count": format_count(item.count()),
+                "trend": item.trend(now)
+            }
+
+        def heat(entry) -> float:
+            return entry[1].heat()
+
+        hot_chats = [chat(*entry) for entry in heapq.nlargest(top_k, ranked, key=heat)]
+
+        by_category = defaultdict(list)
+        tag_scores = defaultdict(float)
+        for content_id, item in ranked:
+            if item.category:
+                by_category[item.category].append((content_id, item))
+            for tag in item.tags:
+                tag_scores[tag] += item.heat()
+        categories = {
+            category: [chat(*entry) for entry in heapq.nlargest(top_k, entries, key=heat)]
+            for category, entries in by_category.items()
+        }
+
+        top_tags = heapq.nlargest(len(HOTSPOT_SLOTS), tag_scores.items(), key=lambda entry: entry[1])
+        hotspots = [{"name": tag, **slot} for (tag, _), slot in zip(top_tags, HOTSPOT_SLOTS)]
+
+        return {"hot_chats": hot_chats, "categories": categories, "hotspots": hotspots}
+
+    async def refresh(self):
+        await self.load_missing_metadata()
+        self.snapshot = self.build_snapshot()
+
+    async def run(self):
+        try:
+            await self.bootstrap()
+        except Exception as e:
+            print(f"Trending bootstrap failed: {e}")
+
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Trending refresh failed: {e}")
+            await asyncio.sleep(settings.TRENDING_REFRESH_INTERVAL)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def hot_chats(self, category: Optional[str] = None) -> List[dict]:
+        if category:
+            return self.snapshot["categories"].get(category, [])
+        return self.snapshot["hot_chats"]
+
+    def hotspots(self) -> List[dict]:
+        return self.snapshot["hotspots"]
+
+# Create a singleton instance
+trending_engine = TrendingEngine()
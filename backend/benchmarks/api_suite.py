@@ -0,0 +1,315 @@
+"""End-to-end API benchmark over the in-memory PostgREST backend.
+
+Seeds the in-memory backend with synthetic data (see benchmarks.seed_data),
+starts the app with its lifespan (search, geo and trending indexes, counter
+flusher) and drives it in-process with concurrent clients. Each client
+repeatedly visits pages of the frontend, issuing the same requests the page
+does:
+
+- discovery: content feed (plus a second page by cursor), hotspots, hot
+  chats, content detail with a view, search
+- group: group list, my groups, group detail (often a very large group),
+  member list
+- course: course list, my courses, course detail, heatmap, progress update
+- local: nearby events, event list, event detail, calendar, checkins,
+  new checkin
+
+Before the load starts, a few write-then-read round trips are checked
+(e.g. an event's date comes back from create, detail, list and update),
+so a run never measures endpoints that silently drop data.
+
+Reports throughput, p50/p95/p99 latency and Supabase queries per request
+(from X-Query-Count) per endpoint and overall. --output writes the results
+as JSON with the git commit, and --baseline compares against an earlier
+results file so regressions show up across commits.
+
+Run from the backend directory:
+
+    python -m benchmarks.api_suite --clients 32 --duration 20 --output results.json
+    python -m benchmarks.api_suite --mix discovery --baseline results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+# Must be set before the app's settings are loaded
+os.environ["SUPABASE_BACKEND"] = "memory"
+os.environ.setdefault("SLOW_REQUEST_THRESHOLD_MS", "0")
+
+import httpx
+
+from app.core.security import create_access_token
+from app.services.geo import geo_index
+from app.services.search import search_index
+from app.services.supabase import supabase_service
+from benchmarks.seed_data import CITY_CENTRE, CHECKIN_TYPES, TOPICS, add_arguments, seed
+from main import app
+
+MIXES = {
+    "all": {"discovery": 0.4, "group": 0.2, "course": 0.2, "local": 0.2},
+    "discovery": {"discovery": 1.0},
+    "group": {"group": 1.0},
+    "course": {"course": 1.0},
+    "local": {"local": 1.0},
+}
+
+
+class Recorder:
+    def __init__(self):
+        self.enabled = False
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.pages = 0
+
+    def record(self, label, seconds, response):
+        if not self.enabled:
+            return
+        self.latencies[label].append(seconds)
+        self.queries[label].append(int(response.headers.get("x-query-count", 0)))
+        if response.status_code >= 400:
+            self.errors[label] += 1
+
+
+class Session:
+    """One simulated user: a token, a random stream and the shared recorder."""
+
+    def __init__(self, client, recorder, ids, rng):
+        self.client = client
+        self.recorder = recorder
+        self.ids = ids
+        self.rng = rng
+        self.user_id = rng.choice(ids["users"])
+        self.headers = {"Authorization": f"Bearer {create_access_token({'sub': self.user_id})}"}
+
+    async def request(self, label, method, url, **kwargs):
+        start = time.perf_counter()
+        response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        self.recorder.record(label, time.perf_counter() - start, response)
+        return response
+
+
+async def discovery_page(session):
+    rng, ids = session.rng, session.ids
+    feed = await session.request("GET /api/content/", "GET", "/api/content/?limit=20")
+    await session.request("GET /api/content/hotspots", "GET", "/api/content/hotspots")
+    await session.request("GET /api/content/hot-chats", "GET", "/api/content/hot-chats")
+    cursor = feed.headers.get("x-next-cursor")
+    if cursor and rng.random() < 0.3:
+        await session.request("GET /api/content/?cursor", "GET", "/api/content/", params={"limit": 20, "cursor": cursor})
+    if rng.random() < 0.6:
+        content_id = rng.choice(ids["content"])
+        await session.request("GET /api/content/{content_id}", "GET", f"/api/content/{content_id}")
+        await session.request("POST /api/content/{content_id}/engagement", "POST",
+                              f"/api/content/{content_id}/engagement", json={"type": "view", "count": 1})
+    if rng.random() < 0.2:
+        await session.request("GET /api/search/", "GET", "/api/search/", params={"q": rng.choice(TOPICS)})
+
+
+async def group_page(session):
+    rng, ids = session.rng, session.ids
+    await session.request("GET /api/groups/", "GET", "/api/groups/?limit=20")
+    await session.request("GET /api/groups/my", "GET", "/api/groups/my")
+    # The first groups are the seeded large ones
+    group_id = ids["groups"][rng.randrange(3)] if rng.random() < 0.3 else rng.choice(ids["groups"])
+    await session.request("GET /api/groups/{group_id}", "GET", f"/api/groups/{group_id}")
+    await session.request("GET /api/groups/{group_id}/members", "GET", f"/api/groups/{group_id}/members")
+
+
+async def course_page(session):
+    rng, ids = session.rng, session.ids
+    await session.request("GET /api/courses/", "GET", "/api/courses/?limit=20")
+    await session.request("GET /api/courses/user/{user_id}", "GET", f"/api/courses/user/{session.user_id}")
+    course_id = rng.choice(ids["courses"])
+    await session.request("GET /api/courses/{course_id}", "GET", f"/api/courses/{course_id}")
+    await session.request("GET /api/courses/heatmap/{user_id}", "GET", f"/api/courses/heatmap/{session.user_id}")
+    enrollment = ids["enrollments"].get(session.user_id)
+    if enrollment and rng.random() < 0.3:
+        await session.request("PUT /api/courses/progress/{user_course_id}", "PUT",
+                              f"/api/courses/progress/{enrollment}", json={"progress": rng.randint(0, 100)})
+
+
+async def local_page(session):
+    rng, ids = session.rng, session.ids
+    lat = CITY_CENTRE[0] + rng.uniform(-0.1, 0.1)
+    lng = CITY_CENTRE[1] + rng.uniform(-0.1, 0.1)
+    await session.request("GET /api/events/nearby", "GET", "/api/events/nearby",
+                          params={"lat": lat, "lng": lng, "radius": 10, "limit": 20})
+    await session.request("GET /api/events/", "GET", "/api/events/?limit=20")
+    event_id = rng.choice(ids["events"])
+    await session.request("GET /api/events/{event_id}", "GET", f"/api/events/{event_id}")
+    await session.request("GET /api/calendar/user/{user_id}", "GET", f"/api/calendar/user/{session.user_id}")
+    await session.request("GET /api/checkins/user/{user_id}", "GET", f"/api/checkins/user/{session.user_id}")
+    if rng.random() < 0.2:
+        day = (datetime.now(timezone.utc).date() - timedelta(days=rng.randint(0, 6))).isoformat()
+        await session.request("POST /api/checkins/user/{user_id}", "POST", f"/api/checkins/user/{session.user_id}",
+                              params={"date": day, "type": rng.choice(CHECKIN_TYPES), "content": "打卡", "emoji": "✨"})
+
+
+PAGES = {"discovery": discovery_page, "group": group_page, "course": course_page, "local": local_page}
+
+
+async def run_client(session, mix, deadline):
+    pages, weights = zip(*mix.items())
+    while time.perf_counter() < deadline:
+        await PAGES[session.rng.choices(pages, weights)[0]](session)
+        session.recorder.pages += 1
+
+
+def same_instant(written: str, returned) -> bool:
+    def parse(value):
+        moment = datetime.fromisoformat(str(value))
+        return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+    return returned is not None and parse(written) == parse(returned)
+
+
+async def check_round_trips(http, headers):
+    """Fail fast when a field written through the API does not read back."""
+    failures = []
+    written = "2026-10-20"
+    created = (await http.post("/api/events/", headers=headers, json={"title": "round trip", "date": written})).json()
+    detail = (await http.get(f"/api/events/{created['id']}", headers=headers)).json()
+    listed = (await http.get("/api/events/", headers=headers, params={"limit": 100})).json()
+    listed = next((event for event in listed if event["id"] == created["id"]), {})
+    for label, event in (("create", created), ("detail", detail), ("list", listed)):
+        if not same_instant(written, event.get("date")):
+            failures.append(f"event date from {label}: wrote {written}, read {event.get('date')}")
+
+    updated = (await http.put(f"/api/events/{created['id']}", headers=headers, json={"date": "2026-11-01T09:30:00+08:00"})).json()
+    if not same_instant("2026-11-01T09:30:00+08:00", updated.get("date")):
+        failures.append(f"event date from update: read {updated.get('date')}")
+    await http.delete(f"/api/events/{created['id']}", headers=headers)
+
+    if failures:
+        raise SystemExit("round trip check failed:\n  " + "\n  ".join(failures))
+    print("round trip checks passed")
+
+
+async def wait_until_ready(timeout=120.0):
+    deadline = time.perf_counter() + timeout
+    while not (search_index.ready and geo_index.ready) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.1)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies, queries, errors, elapsed):
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "queries_per_request": round(sum(queries) / len(queries), 2),
+        "errors": errors
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--", "."], capture_output=True, text=True).stdout.strip())
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def benchmark(args):
+    client = supabase_service.get_client()
+    start = time.perf_counter()
+    ids = seed(client, args)
+    print(f"seeded in {time.perf_counter() - start:.1f}s")
+    client.database.latency = args.db_latency_ms / 1000
+
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    async with app.router.lifespan_context(app):
+        await wait_until_ready()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as http:
+            await check_round_trips(http, {"Authorization": f"Bearer {create_access_token({'sub': ids['users'][0]})}"})
+            sessions = [Session(http, recorder, ids, random.Random(rng.getrandbits(64))) for _ in range(args.clients)]
+
+            warmup_end = time.perf_counter() + args.warmup
+            await asyncio.gather(*(run_client(session, MIXES[args.mix], warmup_end) for session in sessions))
+
+            recorder.enabled = True
+            recorder.pages = 0
+            start = time.perf_counter()
+            deadline = start + args.duration
+            await asyncio.gather(*(run_client(session, MIXES[args.mix], deadline) for session in sessions))
+            elapsed = time.perf_counter() - start
+
+    endpoints = {
+        label: summarize(latencies, recorder.queries[label], recorder.errors[label], elapsed)
+        for label, latencies in sorted(recorder.latencies.items())
+    }
+    all_latencies = [value for values in recorder.latencies.values() for value in values]
+    all_queries = [value for values in recorder.queries.values() for value in values]
+    total = summarize(all_latencies, all_queries, sum(recorder.errors.values()), elapsed)
+    total["pages_per_second"] = round(recorder.pages / elapsed, 1)
+
+    return {
+        "suite": "api",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "total": total,
+        "endpoints": endpoints
+    }
+
+
+def report(results, baseline=None):
+    header = f"{'endpoint':<46} {'req':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'q/req':>6} {'err':>5}"
+    print(header)
+    print("-" * len(header))
+    rows = [*results["endpoints"].items(), ("TOTAL", results["total"])]
+    for label, stats in rows:
+        line = (f"{label:<46} {stats['requests']:>7} {stats['rps']:>8.1f} {stats['p50_ms']:>7.1f}ms "
+                f"{stats['p95_ms']:>6.1f}ms {stats['p99_ms']:>6.1f}ms {stats['queries_per_request']:>6.2f} {stats['errors']:>5}")
+        if baseline is not None:
+            before = baseline["total"] if label == "TOTAL" else baseline["endpoints"].get(label)
+            if before:
+                line += (f"  rps {(stats['rps'] / before['rps'] - 1) * 100:+6.1f}%"
+                         f"  p95 {(stats['p95_ms'] / before['p95_ms'] - 1) * 100:+6.1f}%")
+        print(line)
+    print(f"pages/s: {results['total']['pages_per_second']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before the run")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="all")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="simulated PostgREST round trip")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    report(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
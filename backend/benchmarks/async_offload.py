@@ -0,0 +1,85 @@
+"""Load benchmark for the Supabase thread-pool offload.
+
+Simulates PostgREST round trips with the in-memory backend's fixed latency
+and sends requests to the app at a fixed arrival rate, once with queries
+executed inline on the event loop (the old behaviour) and once through
+``SupabaseService.execute``. Latency is measured from each request's
+scheduled arrival time, so time spent waiting for a blocked event loop is
+included.
+
+Run from the backend directory:
+
+    python -m benchmarks.async_offload --requests 400 --rate 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+from app.core.security import create_access_token
+from app.services.memory_postgrest import MemorySupabaseClient
+from app.services.supabase import supabase_service
+from main import app
+
+
+async def execute_inline(query):
+    return query.execute()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(total, rate):
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(uuid.uuid4())})}"}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        start = time.perf_counter()
+
+        async def one(i):
+            scheduled = start + i / rate
+            await asyncio.sleep(max(0, scheduled - time.perf_counter()))
+            await client.get(f"/api/content/{uuid.UUID(int=i)}")
+            latencies.append(time.perf_counter() - scheduled)
+
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, elapsed
+
+
+def report(label, latencies, elapsed):
+    print(
+        f"{label:<8} rps={len(latencies) / elapsed:8.1f} "
+        f"p50={statistics.median(latencies) * 1000:7.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:7.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=200.0, help="requests per second")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    supabase_service.supabase = MemorySupabaseClient(latency=args.latency_ms / 1000)
+
+    offload = supabase_service.execute
+    supabase_service.execute = execute_inline
+    report("inline", *asyncio.run(run(args.requests, args.rate)))
+
+    supabase_service.execute = offload
+    report("offload", *asyncio.run(run(args.requests, args.rate)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Concurrency check for the buffered counter subsystem.
+
+Hammers CounterService with concurrent joins and leaves on a handful of
+groups while the flush loop is running, against an in-memory stand-in for
+apply_counter_deltas() that sleeps to simulate the database round trip. At
+the end every group's count must equal joins minus leaves.
+
+Run from the backend directory:
+
+    python -m benchmarks.counter_concurrency --operations 20000 --groups 5
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from collections import defaultdict
+
+from app.core.config import settings
+from app.services.counters import counter_service
+from app.services.supabase import supabase_service
+
+
+class CounterStore:
+    """Applies apply_counter_deltas() batches to a dict, like the SQL function."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.values = defaultdict(int)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def rpc(self, function_name, params):
+        return CounterCall(self, params["p_deltas"])
+
+
+class CounterCall:
+    def __init__(self, store, batch):
+        self.store = store
+        self.batch = batch
+
+    def execute(self):
+        time.sleep(self.store.latency)
+        with self.store.lock:
+            self.store.calls += 1
+            for entry in self.batch:
+                key = (entry["table"], entry["column"], entry["id"])
+                self.store.values[key] = max(0, self.store.values[key] + entry["delta"])
+
+
+async def member(group_id, operations, expected):
+    joined = False
+    for _ in range(operations):
+        delta = -1 if joined else 1
+        await counter_service.increment("groups", group_id, "members_count", delta)
+        expected[group_id] += delta
+        joined = not joined
+        await asyncio.sleep(random.random() / 1000)
+
+
+async def run(args):
+    store = CounterStore(args.latency_ms / 1000)
+    supabase_service.supabase = store
+    settings.COUNTER_FLUSH_INTERVAL = args.flush_interval
+
+    expected = defaultdict(int)
+    groups = [f"group-{i}" for i in range(args.groups)]
+    per_member = args.operations // args.members
+
+    counter_service.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        member(random.choice(groups), per_member, expected)
+        for _ in range(args.members)
+    ))
+    await counter_service.stop()
+    elapsed = time.perf_counter() - start
+
+    operations = per_member * args.members
+    mismatches = [
+        group_id for group_id in groups
+        if store.values[("groups", "members_count", group_id)] != expected[group_id]
+    ]
+    print(f"operations={operations} rpc_calls={store.calls} elapsed={elapsed:.2f}s")
+    print(f"stats={counter_service.stats()}")
+    print("OK" if not mismatches else f"MISMATCH in {mismatches}")
+    return not mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--operations", type=int, default=20000)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--groups", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--flush-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    if not asyncio.run(run(args)):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
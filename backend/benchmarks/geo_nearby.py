@@ -0,0 +1,95 @@
+"""Benchmark for the nearby-events grid index.
+
+Places synthetic events around a handful of large cities (with a uniform
+background across the region), then measures index build time and p50/p99
+latency of radius queries issued from random points near those cities.
+A sample of queries is checked against a brute-force scan.
+
+Run from the backend directory:
+
+    python -m benchmarks.geo_nearby --events 100000 --queries 2000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.services.geo import GeoIndex, haversine_km
+
+# (lat, lng, relative weight)
+CITIES = [
+    (39.9042, 116.4074, 5),  # Beijing
+    (31.2304, 121.4737, 5),  # Shanghai
+    (22.5431, 114.0579, 3),  # Shenzhen
+    (23.1291, 113.2644, 3),  # Guangzhou
+    (30.2741, 120.1551, 2),  # Hangzhou
+    (30.5728, 104.0668, 2),  # Chengdu
+]
+BACKGROUND_SHARE = 0.1
+
+
+def random_point(rng):
+    if rng.random() < BACKGROUND_SHARE:
+        return rng.uniform(20, 45), rng.uniform(100, 125)
+    lat, lng, _ = rng.choices(CITIES, [weight for _, _, weight in CITIES])[0]
+    # Roughly a 15km standard deviation around the city centre
+    return rng.gauss(lat, 0.135), rng.gauss(lng, 0.16)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def brute_force(events, lat, lng, radius, limit):
+    matches = []
+    for event_id, (event_lat, event_lng) in events.items():
+        distance = haversine_km(lat, lng, event_lat, event_lng)
+        if distance <= radius:
+            matches.append((distance, event_id))
+    return [event_id for _, event_id in sorted(matches)[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--radii", type=float, nargs="+", default=[1, 5, 10, 25])
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--cell-degrees", type=float, default=None)
+    parser.add_argument("--verify", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = GeoIndex(args.cell_degrees)
+    events = {str(i): random_point(rng) for i in range(args.events)}
+
+    start = time.perf_counter()
+    for event_id, (lat, lng) in events.items():
+        index.add({"id": event_id, "location_coords": {"lat": lat, "lng": lng}})
+    elapsed = time.perf_counter() - start
+    print(f"indexed {args.events} events in {elapsed:.2f}s, {len(index.cells)} cells "
+          f"of {index.cell_degrees} degrees")
+
+    origins = [random_point(rng) for _ in range(args.queries)]
+    for radius in args.radii:
+        latencies = []
+        hits = 0
+        for lat, lng in origins:
+            start = time.perf_counter()
+            results = index.nearby(lat, lng, radius, args.limit)
+            latencies.append(time.perf_counter() - start)
+            hits += len(results)
+
+        for lat, lng in origins[:args.verify]:
+            expected = brute_force(events, lat, lng, radius, args.limit)
+            if [event_id for event_id, _ in index.nearby(lat, lng, radius, args.limit)] != expected:
+                raise SystemExit(f"MISMATCH at ({lat}, {lng}) radius {radius}km")
+
+        print(f"radius={radius:>5}km p50={statistics.median(latencies) * 1000:7.3f}ms "
+              f"p99={percentile(latencies, 99) * 1000:7.3f}ms avg_hits={hits / len(origins):.1f}")
+
+
+if __name__ == "__main__":
+    main()
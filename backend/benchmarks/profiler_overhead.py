@@ -0,0 +1,69 @@
+"""Microbenchmark of the per-query and per-request profiling overhead.
+
+Times the bookkeeping SupabaseService.execute() and the profile_requests
+middleware add on top of each query and request (describing a real
+postgrest query builder, recording it on the request's QueryCounter and
+observing the latency histograms), without any network I/O.
+
+Run from the backend directory:
+
+    python -m benchmarks.profiler_overhead --iterations 200000
+"""
+import argparse
+import random
+import time
+
+from postgrest import SyncPostgrestClient
+
+from app.services.metrics import MetricsService, describe_query, route_template
+from app.services.supabase import QueryCounter
+
+
+def per_call_ns(function, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    client = SyncPostgrestClient("http://localhost/rest/v1")
+    queries = [
+        client.table("content").select("*").eq("id", "1"),
+        client.table("group_members").insert({"group_id": "1", "user_id": "2"}),
+        client.table("groups").update({"name": "n"}).eq("id", "1"),
+        client.rpc("record_activity", {"p_user_id": "1"}),
+    ]
+    scope = {
+        "route": object(),
+        "path": "/api/groups/6f1c2a/members",
+        "path_params": {"group_id": "6f1c2a"}
+    }
+    metrics = MetricsService()
+    counter = QueryCounter()
+
+    def query():
+        builder = queries[rng.randrange(len(queries))]
+        table, operation = describe_query(builder)
+        seconds = rng.random() / 10
+        counter.record(table, operation, seconds)
+        metrics.observe_query(table, operation, seconds)
+
+    def request():
+        metrics.observe_request("POST", route_template(scope), 200, rng.random())
+
+    print(f"per query:   {per_call_ns(query, args.iterations):7.0f} ns")
+    print(f"per request: {per_call_ns(request, args.iterations):7.0f} ns")
+    start = time.perf_counter()
+    text = metrics.render({})
+    print(f"/metrics render: {(time.perf_counter() - start) * 1000:.2f} ms ({len(text.splitlines())} lines)")
+
+
+if __name__ == "__main__":
+    main()
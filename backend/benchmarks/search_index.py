@@ -0,0 +1,103 @@
+"""Benchmark for the in-process search index.
+
+Builds a synthetic corpus of Chinese titles, descriptions and tags drawn
+from a Zipf-distributed vocabulary (plus a few English words), then
+measures indexing throughput, peak memory and query latency for full-term
+and prefix (typeahead) queries.
+
+Run from the backend directory:
+
+    python -m benchmarks.search_index --docs 1000000 --queries 1000
+"""
+import argparse
+import itertools
+import random
+import resource
+import statistics
+import time
+
+from app.services.search import SearchIndex, SEARCH_TABLES
+
+ENGLISH_WORDS = [
+    "quantum", "computing", "generative", "neural", "network", "design", "physics",
+    "deepseek", "reasoning", "spatial", "interaction", "digital", "twin", "ux", "finance",
+]
+
+
+def vocabulary(rng, size):
+    """Random 2-4 character CJK words; drawn with a Zipf-like skew below."""
+    return ["".join(chr(rng.randint(0x4E00, 0x9FFF)) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+
+class Corpus:
+    def __init__(self, rng, vocabulary_size):
+        self.rng = rng
+        self.words = vocabulary(rng, vocabulary_size)
+        # Cumulative weights so choices() does not re-sum them on every call
+        self.weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary_size)))
+
+    def phrase(self, low, high):
+        count = self.rng.randint(low, high)
+        return "".join(self.rng.choices(self.words, cum_weights=self.weights, k=count))
+
+    def document(self, i):
+        return {
+            "id": str(i),
+            "title": self.phrase(2, 5) + " " + self.rng.choice(ENGLISH_WORDS),
+            "name": self.phrase(2, 4),
+            "description": self.phrase(4, 10) + " " + " ".join(self.rng.sample(ENGLISH_WORDS, 3)),
+            "tags": self.rng.choices(self.words, cum_weights=self.weights, k=2),
+        }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def measure(index, queries, prefix):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, limit=20, prefix=prefix)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label, latencies):
+    print(
+        f"{label:<10} p50={statistics.median(latencies) * 1000:8.2f}ms "
+        f"p99={percentile(latencies, 99) * 1000:8.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = Corpus(rng, args.vocabulary)
+    index = SearchIndex()
+
+    start = time.perf_counter()
+    for i in range(args.docs):
+        index.add(SEARCH_TABLES[i % len(SEARCH_TABLES)], corpus.document(i))
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"indexed {args.docs} docs in {elapsed:.1f}s ({args.docs / elapsed:.0f} docs/s), "
+          f"{len(index.postings)} terms, peak RSS {peak_mb:.0f}MB")
+
+    full = [corpus.phrase(1, 2) for _ in range(args.queries)]
+    typeahead = [corpus.phrase(1, 1)[:3] for _ in range(args.queries)]
+
+    report("full", measure(index, full, prefix=False))
+    report("typeahead", measure(index, typeahead, prefix=True))
+
+
+if __name__ == "__main__":
+    main()
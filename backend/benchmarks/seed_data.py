@@ -0,0 +1,177 @@
+"""Synthetic data generator for the in-memory PostgREST backend.
+
+Fills a MemorySupabaseClient with users, content, groups (a few with very
+large member lists), events around a city centre, courses with
+enrollments, checkins and calendar events. Rows are inserted through the
+client in multi-row chunks, so the schema's constraints and indexes are
+exercised exactly as the app would exercise them.
+
+Used by benchmarks.api_suite; can also be run on its own to time seeding:
+
+    python -m benchmarks.seed_data --users 5000 --content 20000
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.services.memory_postgrest import MemorySupabaseClient
+
+TOPICS = ["量子计算", "生成式AI", "神经网络", "艺术哲学", "数字孪生", "脑机接口", "空间计算", "合成生物学"]
+CATEGORIES = ["科技", "设计", "人文", "艺术", "商业"]
+TAGS = ["量子", "设计", "AI", "论文", "展览", "开源", "哲学", "创业", "生物", "交互"]
+CHECKIN_TYPES = ["study", "reading", "exercise", "meditation"]
+CHUNK_SIZE = 1000
+
+# Shanghai; events are spread within roughly 30km of it
+CITY_CENTRE = (31.2304, 121.4737)
+
+
+def add_arguments(parser):
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--content", type=int, default=20000)
+    parser.add_argument("--groups", type=int, default=300)
+    parser.add_argument("--members-per-group", type=int, default=50)
+    parser.add_argument("--large-groups", type=int, default=3)
+    parser.add_argument("--large-group-members", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=3000)
+    parser.add_argument("--courses", type=int, default=500)
+    parser.add_argument("--enrollments-per-user", type=int, default=3)
+    parser.add_argument("--checkins-per-user", type=int, default=10)
+
+
+def timestamp(rng, days_back=365):
+    moment = datetime.now(timezone.utc) - timedelta(seconds=rng.randint(0, days_back * 86400))
+    return moment.isoformat()
+
+
+def insert(client, table, rows):
+    created = []
+    for start in range(0, len(rows), CHUNK_SIZE):
+        created.extend(client.table(table).insert(rows[start:start + CHUNK_SIZE]).execute().data)
+    return created
+
+
+def seed(client, args):
+    """Insert the configured volumes; returns the ids the benchmark mixes need."""
+    rng = random.Random(args.seed)
+
+    users = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(args.users)]
+    insert(client, "users", [{
+        "id": user_id,
+        "email": f"user{i}@example.com",
+        "name": f"用户{i}",
+        "avatar": f"https://picsum.photos/id/{i % 100}/100/100",
+        "bio": "热爱" + rng.choice(TOPICS),
+        "created_at": timestamp(rng, 730)
+    } for i, user_id in enumerate(users)])
+
+    content = insert(client, "content", [{
+        "title": f"{rng.choice(TOPICS)}与{rng.choice(TOPICS)}的交汇点 #{i}",
+        "description": f"探索{rng.choice(TOPICS)}如何改变{rng.choice(TOPICS)}的工作流程。" * 2,
+        "content_body": {"blocks": [{"type": "paragraph", "text": "正文" * 40}]},
+        "category": rng.choice(CATEGORIES),
+        "tags": rng.sample(TAGS, 3),
+        "cover": f"https://picsum.photos/id/{i % 200}/400/300",
+        "author_id": rng.choice(users),
+        "views": int(rng.paretovariate(1.2) * 10),
+        "likes": int(rng.paretovariate(1.5) * 3),
+        "created_at": timestamp(rng)
+    } for i in range(args.content)])
+
+    groups = insert(client, "groups", [{
+        "name": f"{rng.choice(TOPICS)}研讨组 #{i}",
+        "description": f"每周讨论{rng.choice(TOPICS)}最新论文与实践。",
+        "cover": f"https://picsum.photos/id/{i % 200}/400/300",
+        "icon": "science",
+        "category": rng.choice(CATEGORIES),
+        "tags": rng.sample(TAGS, 2),
+        "created_at": timestamp(rng)
+    } for i in range(args.groups)])
+
+    members = []
+    for i, group in enumerate(groups):
+        size = args.large_group_members if i < args.large_groups else rng.randint(1, 2 * args.members_per_group)
+        for user_id in rng.sample(users, min(size, len(users))):
+            members.append({"group_id": group["id"], "user_id": user_id, "joined_at": timestamp(rng)})
+    insert(client, "group_members", members)
+    for group in groups:
+        count = len(client.table("group_members").select("id").eq("group_id", group["id"]).execute().data)
+        client.table("groups").update({"members_count": count}).eq("id", group["id"]).execute()
+
+    events = insert(client, "events", [{
+        "title": f"{rng.choice(TOPICS)}同城交流会 #{i}",
+        "description": "线下分享与讨论。",
+        "category": rng.choice(CATEGORIES),
+        "tags": rng.sample(TAGS, 2),
+        "start_date": (datetime.now(timezone.utc) + timedelta(days=rng.randint(-30, 90))).isoformat(),
+        "location": "上海",
+        "location_coords": {
+            "lat": CITY_CENTRE[0] + rng.uniform(-0.27, 0.27),
+            "lng": CITY_CENTRE[1] + rng.uniform(-0.32, 0.32)
+        },
+        "cover": f"https://picsum.photos/id/{i % 200}/400/300",
+        "organizer_id": rng.choice(users),
+        "created_at": timestamp(rng)
+    } for i in range(args.events)])
+
+    courses = insert(client, "courses", [{
+        "title": f"{rng.choice(TOPICS)}进阶课程 #{i}",
+        "description": "从基础到实践的系统课程。",
+        "category": rng.choice(CATEGORIES),
+        "tags": rng.sample(TAGS, 2),
+        "instructor_id": rng.choice(users),
+        "cover": f"https://picsum.photos/id/{i % 200}/400/300",
+        "created_at": timestamp(rng)
+    } for i in range(args.courses)])
+
+    enrollments = insert(client, "user_courses", [
+        {"user_id": user_id, "course_id": course["id"], "progress": rng.randint(0, 100)}
+        for user_id in users
+        for course in rng.sample(courses, min(args.enrollments_per_user, len(courses)))
+    ])
+
+    today = datetime.now(timezone.utc).date()
+    insert(client, "checkins", [{
+        "user_id": user_id,
+        "date": (today - timedelta(days=rng.randint(0, 119))).isoformat(),
+        "type": rng.choice(CHECKIN_TYPES),
+        "content": "今日打卡",
+        "emoji": "✨",
+        "created_at": timestamp(rng, 120)
+    } for user_id in users for _ in range(args.checkins_per_user)])
+
+    insert(client, "calendar_events", [{
+        "user_id": user_id,
+        "title": "学习计划",
+        "start_time": (datetime.now(timezone.utc) + timedelta(days=rng.randint(0, 30))).isoformat(),
+        "end_time": (datetime.now(timezone.utc) + timedelta(days=rng.randint(31, 60))).isoformat()
+    } for user_id in users for _ in range(2)])
+
+    return {
+        "users": users,
+        "content": [row["id"] for row in content],
+        "groups": [row["id"] for row in groups],
+        "events": [row["id"] for row in events],
+        "courses": [row["id"] for row in courses],
+        "enrollments": {row["user_id"]: row["id"] for row in enrollments}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    client = MemorySupabaseClient()
+    start = time.perf_counter()
+    seed(client, args)
+    elapsed = time.perf_counter() - start
+    counts = {name: len(table.rows) for name, table in client.database.tables.items() if table.rows}
+    print(f"seeded {sum(counts.values())} rows in {elapsed:.1f}s: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Microbenchmark of list response serialization.
+
+Serializes get_content and get_groups pages of database-shaped rows
+(every column select("*") returns) in three ways:
+
+- strict: FastAPI's response_model path (validate every row, dump to JSON)
+- jsonable: the same validation followed by jsonable_encoder + json.dumps,
+  which is what FastAPI falls back to with a custom response class
+- trusted: serialize_rows() projection + FastJSONResponse rendering
+
+Run from the backend directory:
+
+    python -m benchmarks.serialization --rows 100 --iterations 2000
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.schemas.content import ContentResponse
+from app.schemas.group import GroupResponse
+from app.services.serialization import FastJSONResponse, orjson, serialize_rows
+
+
+def timestamp(rng):
+    moment = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=rng.randint(0, 30_000_000))
+    return moment.isoformat()
+
+
+def content_row(rng):
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "title": "量子计算与生成式设计的交汇点",
+        "description": "探索量子算法如何改变生成式设计的工作流程。" * 3,
+        "content_body": {"blocks": [{"type": "paragraph", "text": "正文" * 40}]},
+        "category": rng.choice(["科技", "设计", "人文"]),
+        "tags": ["量子", "设计", "AI"],
+        "cover": "https://picsum.photos/id/10/400/300",
+        "media_files": None,
+        "author_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "views": rng.randint(0, 100_000),
+        "likes": rng.randint(0, 10_000),
+        "shares": rng.randint(0, 1_000),
+        "comments_count": rng.randint(0, 500),
+        "is_published": True,
+        "published_at": timestamp(rng),
+        "created_at": timestamp(rng),
+        "updated_at": timestamp(rng),
+    }
+
+
+def group_row(rng):
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "name": "量子计算研讨组",
+        "description": "每周讨论量子计算最新论文与实践。",
+        "cover": "https://picsum.photos/id/20/400/300",
+        "icon": "science",
+        "category": "科技",
+        "tags": ["量子", "论文"],
+        "settings": {"join_policy": "open"},
+        "members_count": rng.randint(0, 50_000),
+        "posts_count": rng.randint(0, 5_000),
+        "is_public": True,
+        "created_at": timestamp(rng),
+        "updated_at": timestamp(rng),
+    }
+
+
+def rate(function, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return iterations / (time.perf_counter() - start)
+
+
+def compare(label, rows, model, iterations):
+    adapter = TypeAdapter(List[model])
+
+    def strict():
+        return adapter.dump_json(adapter.validate_python(rows))
+
+    def jsonable():
+        return json.dumps(jsonable_encoder(adapter.validate_python(rows))).encode()
+
+    def trusted():
+        return serialize_rows(rows, model).body
+
+    settings.RESPONSE_VALIDATION_STRICT = False
+    results = {name: rate(function, iterations) for name, function in
+               (("strict", strict), ("jsonable", jsonable), ("trusted", trusted))}
+    for name, pages in results.items():
+        print(f"{label:<8} {name:<9} {pages:9.0f} pages/s  {pages * len(rows):11.0f} rows/s  "
+              f"{pages / results['strict']:5.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"renderer: {'orjson' if orjson is not None else 'json'} ({FastJSONResponse.__name__})")
+    compare("content", [content_row(rng) for _ in range(args.rows)], ContentResponse, args.iterations)
+    compare("groups", [group_row(rng) for _ in range(args.rows)], GroupResponse, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -253,6 +253,13 @@ CREATE TABLE user_notifications (
     read_at TIMESTAMP WITH TIME ZONE
 );
 
+-- Revoked Tokens Table (logged-out access tokens, by JWT id)
+CREATE TABLE revoked_tokens (
+    jti TEXT PRIMARY KEY,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Create indexes for better performance
 CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_users_created_at ON users(created_at);
@@ -322,6 +329,9 @@ CREATE INDEX idx_user_notifications_user_id ON user_notifications(user_id);
 CREATE INDEX idx_user_notifications_is_read ON user_notifications(is_read);
 CREATE INDEX idx_user_notifications_created_at ON user_notifications(created_at);
 
+CREATE INDEX idx_revoked_tokens_expires_at ON revoked_tokens(expires_at);
+CREATE INDEX idx_revoked_tokens_revoked_at ON revoked_tokens(revoked_at);
+
 -- Create foreign key constraints with cascade delete
 ALTER TABLE content_comments ADD CONSTRAINT fk_content_comments_content_id FOREIGN KEY (content_id) REFERENCES content(id) ON DELETE CASCADE;
 ALTER TABLE group_members ADD CONSTRAINT fk_group_members_group_id FOREIGN KEY (group_id) REFERENCES groups(id) ON DELETE CASCADE;
@@ -331,6 +341,61 @@ ALTER TABLE user_events ADD CONSTRAINT fk_user_events_event_id FOREIGN KEY (even
 ALTER TABLE user_courses ADD CONSTRAINT fk_user_courses_course_id FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE;
 ALTER TABLE course_modules ADD CONSTRAINT fk_course_modules_course_id FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE;
 
+-- Apply a batch of counter deltas in place so concurrent writers don't
+-- overwrite each other. p_deltas is a JSON array of
+-- {"table": ..., "column": ..., "id": ..., "delta": ...} objects.
+CREATE OR REPLACE FUNCTION apply_counter_deltas(p_deltas JSONB)
+RETURNS VOID AS $$
+DECLARE
+    entry JSONB;
+BEGIN
+    FOR entry IN SELECT * FROM jsonb_array_elements(p_deltas)
+    LOOP
+        IF (entry->>'table', entry->>'column') NOT IN (
+            ('groups', 'members_count'),
+            ('events', 'attendees_count'),
+            ('courses', 'enrolled_count'),
+            ('content', 'views'),
+            ('content', 'likes'),
+            ('content', 'shares')
+        ) THEN
+            RAISE EXCEPTION 'Unknown counter %.%', entry->>'table', entry->>'column';
+        END IF;
+        
+        EXECUTE format(
+            'UPDATE %I SET %I = GREATEST(0, COALESCE(%I, 0) + $1) WHERE id = $2',
+            entry->>'table', entry->>'column', entry->>'column'
+        ) USING (entry->>'delta')::INTEGER, (entry->>'id')::UUID;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fold p_count activities into a user's daily heatmap rollup and return the
+-- day's new level: the number of p_thresholds the activity count has reached.
+CREATE OR REPLACE FUNCTION record_activity(p_user_id UUID, p_date DATE, p_activity TEXT, p_thresholds INTEGER[], p_count INTEGER DEFAULT 1)
+RETURNS INTEGER AS $$
+DECLARE
+    new_level INTEGER;
+BEGIN
+    INSERT INTO heatmap_data (user_id, date, level, activities)
+    VALUES (
+        p_user_id,
+        p_date,
+        (SELECT COUNT(*) FROM unnest(p_thresholds) AS t WHERE t <= p_count),
+        array_fill(p_activity, ARRAY[p_count])
+    )
+    ON CONFLICT (user_id, date) DO UPDATE SET
+        activities = COALESCE(heatmap_data.activities, '{}') || array_fill(p_activity, ARRAY[p_count]),
+        level = (
+            SELECT COUNT(*) FROM unnest(p_thresholds) AS t
+            WHERE t <= COALESCE(cardinality(heatmap_data.activities), 0) + p_count
+        )
+    RETURNING level INTO new_level;
+
+    RETURN new_level;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Create triggers for automatic updated_at timestamps
 CREATE OR REPLACE FUNCTION update_timestamp()
 RETURNS TRIGGER AS $$
@@ -1,12 +1,47 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import auth, users, content, groups, events, courses, calendar, checkins
+from fastapi.responses import PlainTextResponse
+from app.api import auth, users, content, groups, events, courses, calendar, checkins, search
+from app.api.deps import get_token_payload
 from app.core.config import settings
+from app.core.security import verified_tokens
+from app.services.supabase import supabase_service, query_counter, QueryCounter
+from app.services.cache import cache_service
+from app.services.counters import counter_service
+from app.services.trending import trending_engine
+from app.services.search import search_index
+from app.services.geo import geo_index
+from app.services.hasher import password_hasher
+from app.services.revocation import revocation_service
+from app.services.heatmap import heatmap_service
+from app.services.memberships import membership_service
+from app.services.conditional import body_etag, cache_control, etag_matches, resource_for_path
+from app.services.compression import CompressionMiddleware
+from app.services.metrics import metrics_service, route_template
+import time
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    password_hasher.start()
+    revocation_service.start()
+    counter_service.start()
+    trending_engine.start()
+    search_index.start()
+    geo_index.start()
+    yield
+    geo_index.stop()
+    search_index.stop()
+    trending_engine.stop()
+    await counter_service.stop()
+    revocation_service.stop()
+    password_hasher.stop()
 
 app = FastAPI(
     title=settings.APP_NAME,
     description="x² Knowledge Nebula API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -16,17 +51,67 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Query-Count", "ETag", "Last-Modified", "Server-Timing"],
 )
 
-# Include routers
+@app.middleware("http")
+async def conditional_get(request: Request, call_next):
+    response = await call_next(request)
+    # Detail routes set their own id/updated_at ETag; streamed NDJSON is left alone
+    if (not settings.HTTP_CONDITIONAL_ENABLED or request.method != "GET" or response.status_code != 200
+            or "etag" in response.headers
+            or not response.headers.get("content-type", "").startswith("application/json")):
+        return response
+    
+    # Lists have no single updated_at, so their ETag is a hash of the rendered body
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    etag = body_etag(body)
+    headers = {"ETag": etag, "Cache-Control": cache_control(resource_for_path(request.url.path))}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, status_code=response.status_code, headers={**response.headers, **headers})
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    counter = QueryCounter()
+    query_counter.set(counter)
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    response.headers["X-Query-Count"] = str(counter.count)
+    
+    if settings.SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = (
+            f'db;dur={counter.seconds * 1000:.1f};desc="{counter.count} queries", app;dur={elapsed * 1000:.1f}'
+        )
+    
+    if settings.METRICS_ENABLED:
+        metrics_service.observe_request(request.method, route_template(request.scope), response.status_code, elapsed)
+    
+    threshold = settings.SLOW_REQUEST_THRESHOLD_MS
+    if threshold and elapsed * 1000 >= threshold:
+        metrics_service.slow_requests += 1
+        slowest = sorted(counter.queries, key=lambda query: query[2], reverse=True)[:5]
+        details = ", ".join(f"{table} {operation} {seconds * 1000:.0f}ms" for table, operation, seconds in slowest)
+        print(f"Slow request: {request.method} {request.url.path} took {elapsed * 1000:.0f}ms "
+              f"with {counter.count} queries ({details})")
+    return response
+
+# Outermost, so everything above sees uncompressed bodies
+app.add_middleware(CompressionMiddleware)
+
+# Include routers; everything except auth requires a valid access token
+authenticated = [Depends(get_token_payload)]
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
-app.include_router(users.router, prefix="/api/users", tags=["users"])
-app.include_router(content.router, prefix="/api/content", tags=["content"])
-app.include_router(groups.router, prefix="/api/groups", tags=["groups"])
-app.include_router(events.router, prefix="/api/events", tags=["events"])
-app.include_router(courses.router, prefix="/api/courses", tags=["courses"])
-app.include_router(calendar.router, prefix="/api/calendar", tags=["calendar"])
-app.include_router(checkins.router, prefix="/api/checkins", tags=["checkins"])
+app.include_router(users.router, prefix="/api/users", tags=["users"], dependencies=authenticated)
+app.include_router(content.router, prefix="/api/content", tags=["content"], dependencies=authenticated)
+app.include_router(groups.router, prefix="/api/groups", tags=["groups"], dependencies=authenticated)
+app.include_router(events.router, prefix="/api/events", tags=["events"], dependencies=authenticated)
+app.include_router(courses.router, prefix="/api/courses", tags=["courses"], dependencies=authenticated)
+app.include_router(calendar.router, prefix="/api/calendar", tags=["calendar"], dependencies=authenticated)
+app.include_router(checkins.router, prefix="/api/checkins", tags=["checkins"], dependencies=authenticated)
+app.include_router(search.router, prefix="/api/search", tags=["search"], dependencies=authenticated)
 
 @app.get("/")
 async def root():
@@ -35,3 +120,54 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/health/pool")
+async def pool_health():
+    return supabase_service.pool_stats()
+
+@app.get("/health/single-flight")
+async def single_flight_health():
+    return supabase_service.single_flight.stats()
+
+@app.get("/health/cache")
+async def cache_health():
+    return cache_service.stats()
+
+@app.get("/health/counters")
+async def counter_health():
+    return counter_service.stats()
+
+@app.get("/health/geo")
+async def geo_health():
+    return geo_index.stats()
+
+@app.get("/health/hasher")
+async def hasher_health():
+    return password_hasher.stats()
+
+@app.get("/health/tokens")
+async def token_cache_health():
+    return verified_tokens.stats()
+
+@app.get("/health/revocations")
+async def revocation_health():
+    return revocation_service.stats()
+
+@app.get("/health/memberships")
+async def membership_health():
+    return membership_service.stats()
+
+@app.get("/health/heatmap")
+async def heatmap_health():
+    return heatmap_service.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    pool = supabase_service.pool_stats()
+    return PlainTextResponse(metrics_service.render({
+        "supabase_queries_in_flight": pool["queries_in_flight"],
+        "supabase_queries_queued": pool["queries_queued"],
+        "supabase_open_connections": pool["open_connections"],
+        "supabase_active_connections": pool["active_connections"],
+        "supabase_single_flight_in_flight": len(supabase_service.single_flight.flights)
+    }), media_type="text/plain; version=0.0.4")